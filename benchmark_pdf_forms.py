@@ -0,0 +1,58 @@
+"""
+Compare PyMuPDF form reading and filling in procedure_generator.pdf_forms with fillpdf.
+
+fillpdf isn't a dependency of the tool, install it to run this: pip install fillpdf
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+from procedure_generator.pdf_forms import fill_pdf, read_form_fields
+
+
+def benchmark(pdf_paths, repeat=5):
+    """Time reading and filling each PDF with pdf_forms and with fillpdf"""
+    from fillpdf import fillpdfs
+
+    def timed(function):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - start) / repeat
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        output_pdf = os.path.join(temp_folder, "output.pdf")
+        print(f"{'PDF':<30} {'read':>20} {'fill':>20}")
+        for pdf_path in pdf_paths:
+            data = read_form_fields(pdf_path)
+            results = []
+            for ours, theirs in [
+                (lambda: read_form_fields(pdf_path), lambda: fillpdfs.get_form_fields(pdf_path)),
+                (
+                    lambda: fill_pdf(pdf_path, output_pdf, data),
+                    lambda: fillpdfs.write_fillable_pdf(pdf_path, output_pdf, data),
+                ),
+            ]:
+                ours_time = timed(ours)
+                theirs_time = timed(theirs)
+                results.append(f"{ours_time * 1000:6.1f} vs {theirs_time * 1000:6.1f} ms")
+            print(f"{os.path.basename(pdf_path):<30} {results[0]:>20} {results[1]:>20}")
+
+
+if __name__ == "__main__":
+    examples = os.path.join(os.path.dirname(__file__), "procedure_generator", "examples")
+    parser = argparse.ArgumentParser(
+        description="Compare PyMuPDF form reading and filling with fillpdf"
+    )
+    parser.add_argument(
+        "pdf_paths",
+        nargs="*",
+        default=sorted(glob.glob(os.path.join(examples, "**", "*.pdf"), recursive=True)),
+        help="PDFs to benchmark (defaults to the example PDFs)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+
+    args = parser.parse_args()
+
+    benchmark(args.pdf_paths, args.repeat)
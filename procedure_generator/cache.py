@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from procedure_generator.config_loader import config
+
+
+def get_cache_folder(name: str) -> Path:
+    """Return a named folder inside the cache folder, creating it if needed"""
+    base = config.cache.folder
+    if not base:
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(Path.home(), ".cache")
+        base = os.path.join(base, "SWP Generator")
+
+    folder = Path(base) / name
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def cache_key(*parts) -> str:
+    """Build a stable file-system safe key from the given parts"""
+    text = "\0".join(str(part) for part in parts)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def file_identity(path) -> tuple[str, int, int]:
+    """Return (absolute path, size, mtime) used to detect when a file has changed"""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def read_json(path) -> dict | None:
+    """Read a JSON cache file, returning None if it is missing or unreadable"""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    """Atomically write a JSON cache file so concurrent readers never see a partial file"""
+    folder = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class DiskCache:
+    """
+    Bounded key/value cache stored in a SQLite file in the cache folder.
+
+    Entries are evicted least recently used first once there are more than max_entries, or once
+    their total size is over max_bytes. The cache is best effort: any database error is treated
+    as a miss so a broken cache never stops a run.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1000, max_bytes: int | None = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if not config.cache.enabled:
+            return None
+        if self._connection is None:
+            path = get_cache_folder("db") / f"{self.name}.sqlite"
+            connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_used REAL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            return row[0]
+        except (sqlite3.Error, OSError):
+            return None
+
+    def put(self, key: str, value: bytes):
+        try:
+            connection = self._connect()
+            if connection is None:
+                return
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._evict(connection)
+        except (sqlite3.Error, OSError):
+            pass
+
+    def delete(self, key: str):
+        try:
+            connection = self._connect()
+            if connection is None:
+                return
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _evict(self, connection: sqlite3.Connection):
+        connection.execute(
+            "DELETE FROM entries WHERE key IN "
+            "(SELECT key FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        if self.max_bytes is not None:
+            connection.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM "
+                "(SELECT key, SUM(size) OVER (ORDER BY last_used DESC) AS total FROM entries) "
+                "WHERE total > ?)",
+                (self.max_bytes,),
+            )
+
+    def get_json(self, key: str):
+        value = self.get(key)
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+
+    def put_json(self, key: str, value):
+        self.put(key, json.dumps(value).encode("utf-8"))
@@ -31,10 +31,8 @@ class TimeoutsConfig(BaseModel):
     field_interaction_delay: int = 50
     short_timeout: int = 300
     standard_timeout: int = 1000
-    navigation_timeout: int = 500
-    content_change_threshold: int = 500
-    next_button_check_interval: int = 5
-    periodic_page_check_interval: int = 10
+    navigation_debounce: int = 150
+    navigation_event_interval: int = 50
 
 
 class UISettingsConfig(BaseModel):
@@ -47,13 +45,58 @@ class WorksafeBCConfig(BaseModel):
     url: str = "https://prevnop.online.worksafebc.com/"
 
 
+class RiskScanConfig(BaseModel):
+    workers: int = 0
+    parallel_min_pages: int = 0
+    pages_per_task: int = 20
+
+
+class ExportConfig(BaseModel):
+    workers: int = 0
+
+
 class NOPConfig(BaseModel):
+    risk_terms: Dict[str, str] = Field(
+        default_factory=lambda: {
+            "low risk": "Low", "moderate risk": "Moderate", "high risk": "High"
+        }
+    )
+    risk_scan: RiskScanConfig = Field(default_factory=RiskScanConfig)
+    export: ExportConfig = Field(default_factory=ExportConfig)
+    bulk_fill: bool = False
     transformations: Dict[str, Any] = Field(default_factory=dict)
     pages: List[Dict[str, Any]] = Field(default_factory=list)
 
 
+class GenerationConfig(BaseModel):
+    batch_workers: int = 0
+    skip_unchanged: bool = True
+    folder_scan_threads: int = 16
+    layout_pagination: bool = True
+    prerendered_procedures: bool = False
+
+
+class UpdateMasterConfig(BaseModel):
+    incremental_save: bool = True
+
+
+class CacheConfig(BaseModel):
+    enabled: bool = True
+    folder: str = ""
+    procedure_text_max_entries: int = 2000
+    field_layout_max_entries: int = 500
+    expanded_template_max_entries: int = 50
+    expanded_template_max_mb: int = 200
+    procedure_fragment_max_entries: int = 2000
+    procedure_fragment_max_mb: int = 200
+    swp_export_max_entries: int = 10000
+
+
 class ExcelToPDFProcessingConfig(BaseModel):
     default_sheet_name: str = ""
+    reader: str = "openpyxl"
+    batch_filename_column: str = ""
+    batch_workers: int = 0
 
 
 class FieldMappingConfig(BaseModel):
@@ -61,8 +104,15 @@ class FieldMappingConfig(BaseModel):
     type: str = "text"
 
 
+class ExcelToPDFTargetConfig(BaseModel):
+    template: str
+    output_name: str = ""
+    field_mappings: Dict[str, FieldMappingConfig] = Field(default_factory=dict)
+
+
 class ExcelToPDFConfig(BaseModel):
     field_mappings: Dict[str, FieldMappingConfig] = Field(default_factory=dict)
+    targets: Dict[str, ExcelToPDFTargetConfig] = Field(default_factory=dict)
     processing: ExcelToPDFProcessingConfig = Field(default_factory=ExcelToPDFProcessingConfig)
 
 
@@ -75,6 +125,9 @@ class Config(BaseSettings):
     timeouts: TimeoutsConfig = Field(default_factory=TimeoutsConfig)
     ui_settings: UISettingsConfig = Field(default_factory=UISettingsConfig)
     worksafe_bc: WorksafeBCConfig = Field(default_factory=WorksafeBCConfig)
+    generation: GenerationConfig = Field(default_factory=GenerationConfig)
+    update_master: UpdateMasterConfig = Field(default_factory=UpdateMasterConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
     nop: NOPConfig = Field(default_factory=NOPConfig, alias="NOP")
     excel_to_pdf: ExcelToPDFConfig = Field(default_factory=ExcelToPDFConfig, alias="EXCEL_TO_PDF")
 
@@ -96,7 +149,7 @@ class Config(BaseSettings):
             raise FileNotFoundError("Failed to load configuration file 'swp_config.yaml'.")
 
     def _find_config_file(self, filename: str) -> Path | None:
-        """Find config file in executable directory or parent directory"""
+        """Find config file in executable directory, its parent directory or beside this module"""
         exe_dir = Path(sys.argv[0]).resolve().parent
         config_path = exe_dir / filename
         
@@ -108,6 +161,11 @@ class Config(BaseSettings):
         if parent_config.exists():
             return parent_config
         
+        # Try the package folder, for code run from source by another program like a test runner
+        package_config = Path(__file__).resolve().parent / filename
+        if package_config.exists():
+            return package_config
+        
         return None
 
 
@@ -1,86 +1,197 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import argparse
-from typing import Optional
-import pandas as pd
-from fillpdf import fillpdfs
+import os
+import re
+from typing import TYPE_CHECKING, Optional
 from ..config_loader import config
+from ..pdf_forms import fill_pdf
+from .excel_reader import get_sheet_name, read_vertical_sheet
+from .field_mapper import FieldMapper, get_field_mapper
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Characters Windows doesn't allow in file names
+INVALID_FILENAME_CHARACTERS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
 
 def excel_pdf(excel_file: str, pdf_template: str, output_pdf: str):
-    # Use default sheet name from config, or first sheet if empty
-    sheet_name = config.excel_to_pdf.processing.default_sheet_name
-    if not sheet_name:  # If empty string, use first sheet
-        sheet_name = 0
-    
-    # Read Excel file without headers (first column as keys, second as values)
-    df = pd.read_excel(excel_file, sheet_name=sheet_name, header=None)
-    
-    # Convert to dictionary with first column as keys, second as values
-    if len(df.columns) >= 2:
-        excel_data = dict(zip(df[0], df[1]))
-    else:
-        raise ValueError("Excel file must have at least 2 columns")
-
-    # Skip empty rows (always enabled)
-    excel_data = {k: v for k, v in excel_data.items() if pd.notna(k) and pd.notna(v)}
-
-    # Get field mappings from config
-    field_map = config.excel_to_pdf.field_mappings
-
-    # Map Excel data to PDF fields
-    pdf_data = {}
-    for excel_field, value in excel_data.items():
-        # Always trim whitespace
-        excel_field_clean = str(excel_field).strip()
-        
-        # Find matching field mapping
-        field_config = None
-        for config_excel_field, mapping_config in field_map.items():
-            if config_excel_field.lower() == excel_field_clean.lower():
-                field_config = mapping_config
-                break
-        
-        if field_config:
-            # Extract PDF field name and type from Pydantic model
-            try:
-                pdf_field = field_config.pdf_field
-                field_type = field_config.type
-                
-                if not pdf_field:
-                    print(f"Warning: No pdf_field specified for '{excel_field}' in configuration")
-                    continue
-            except AttributeError:
-                print(f"Warning: Invalid configuration format for '{excel_field}' - missing required attributes")
-                continue
-            
-            # Always trim value if it's a string
-            if isinstance(value, str):
-                value = value.strip()
-            
-            # Handle checkbox values - only convert if field type is checkbox
-            if field_type == "checkbox" and isinstance(value, str):
-                value_lower = value.lower()
-                if value_lower in ["yes", "true", "1", "on"]:
-                    value = 'Yes'
-                elif value_lower in ["no", "false", "0", "off"]:
-                    value = 'Off'
-            
-            pdf_data[str(pdf_field).strip()] = value
+    excel_data = read_vertical_sheet(excel_file)
+
+    pdf_data = get_field_mapper().map_record(excel_data)
 
     # Fill the PDF
-    fillpdfs.write_fillable_pdf(pdf_template, output_pdf, pdf_data)
+    fill_pdf(pdf_template, output_pdf, pdf_data)
 
     print(f"\nFilled PDF saved as: {output_pdf}")
     print(f"Mapped {len(pdf_data)} fields from Excel to PDF")
 
+# Template bytes for the batch worker processes, read once by the process initializer
+_template_bytes = None
+
+def _load_template(template_bytes: bytes):
+    global _template_bytes
+    _template_bytes = template_bytes
+
+def _fill_row(output_pdf: str, pdf_data: dict):
+    fill_pdf(_template_bytes, output_pdf, pdf_data)
+
+def read_excel_rows(excel_file: str) -> "pd.DataFrame":
+    """Read a horizontal sheet, one record per row with the column headers as columns"""
+    import pandas as pd
+
+    df = pd.read_excel(excel_file, sheet_name=get_sheet_name(), header=0, dtype=object)
+
+    # Skip rows with nothing in them
+    return df.dropna(how="all").reset_index(drop=True)
+
+def get_batch_output_names(df: "pd.DataFrame") -> list[str]:
+    """Name each output PDF from the configured column, or by row number without one"""
+    import pandas as pd
+
+    filename_column = config.excel_to_pdf.processing.batch_filename_column.strip().lower()
+    column = next(
+        (c for c in df.columns if filename_column and str(c).strip().lower() == filename_column),
+        None,
+    )
+
+    names = []
+    used = set()
+    for row_number in range(1, len(df) + 1):
+        name = ""
+        value = df[column].iloc[row_number - 1] if column is not None else None
+        # A single cell gives a single bool
+        if bool(pd.notna(value)):
+            name = INVALID_FILENAME_CHARACTERS.sub("_", str(value).strip()).strip(" .")
+        name = name or f"row_{row_number}"
+
+        # Two rows with the same name get numbered outputs instead of overwriting each other
+        unique_name = name
+        suffix = 2
+        while unique_name.lower() in used:
+            unique_name = f"{name}_{suffix}"
+            suffix += 1
+        used.add(unique_name.lower())
+        names.append(f"{unique_name}.pdf")
+    return names
+
+def excel_pdf_batch(
+    excel_file: str, pdf_template: str, output_folder: str, workers: Optional[int] = None
+) -> dict:
+    """
+    Fill one PDF per row of a horizontal sheet, whose column headers are the field mapping keys.
+
+    The template is read once and handed to each worker process, and the rows are filled in
+    parallel into the output folder.
+    """
+    # pandas is only needed for batches, so single PDFs don't pay for importing it
+    import pandas as pd
+
+    df = read_excel_rows(excel_file)
+    if df.empty:
+        print(f"No rows found in {excel_file}")
+        return {}
+
+    # Convert whole columns at once, then drop the empty cells of each row
+    rows = [
+        {k: v for k, v in record.items() if pd.notna(v)}
+        for record in get_field_mapper().map_frame(df).to_dict(orient="records")
+    ]
+
+    with open(pdf_template, "rb") as template_file:
+        template_bytes = template_file.read()
+
+    os.makedirs(output_folder, exist_ok=True)
+    output_pdfs = [os.path.join(output_folder, name) for name in get_batch_output_names(df)]
+
+    workers = workers or config.excel_to_pdf.processing.batch_workers or None
+    print(f"Filling {len(rows)} PDFs...")
+
+    results = {}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_load_template, initargs=(template_bytes,)
+    ) as executor:
+        futures = {
+            executor.submit(_fill_row, output_pdf, pdf_data): output_pdf
+            for output_pdf, pdf_data in zip(output_pdfs, rows)
+        }
+        for future in as_completed(futures):
+            output_pdf = futures[future]
+            try:
+                future.result()
+                results[output_pdf] = None
+            except Exception as e:
+                results[output_pdf] = str(e)
+                print(f"Failed: {output_pdf}: {e}")
+
+    failed = {path: error for path, error in results.items() if error}
+    print(f"\nFilled {len(rows) - len(failed)} PDFs in {output_folder}, {len(failed)} failed")
+    return results
+
+def excel_pdf_targets(excel_file: str, output_folder: str) -> dict:
+    """
+    Fill every template in EXCEL_TO_PDF.targets from one Excel record.
+
+    The sheet is read once, each target's mappings are applied to it, and the targets are
+    filled one after another into the output folder. There are only a few targets, so
+    starting worker processes for them would take longer than filling them.
+    """
+    targets = config.excel_to_pdf.targets
+    if not targets:
+        raise Exception("No targets are set up in EXCEL_TO_PDF.targets in swp_config.yaml")
+
+    excel_data = read_vertical_sheet(excel_file)
+
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"Filling {len(targets)} PDFs...")
+
+    results = {}
+    for target_name, target in targets.items():
+        output_name = target.output_name or f"{target_name}.pdf"
+        output_pdf = os.path.join(output_folder, INVALID_FILENAME_CHARACTERS.sub("_", output_name))
+        try:
+            pdf_data = FieldMapper(target.field_mappings).map_record(excel_data)
+            fill_pdf(target.template, output_pdf, pdf_data)
+            results[target_name] = None
+            print(f"{target_name}: mapped {len(pdf_data)} fields into {output_pdf}")
+        except Exception as e:
+            results[target_name] = str(e)
+            print(f"Failed: {target_name}: {e}")
+
+    failed = {name: error for name, error in results.items() if error}
+    print(f"\nFilled {len(targets) - len(failed)} PDFs in {output_folder}, {len(failed)} failed")
+    return results
+
 def main():
     parser = argparse.ArgumentParser(description='Fill PDF form from Excel data')
     parser.add_argument('excel_file', help='Path to the Excel file')
-    parser.add_argument('pdf_template', help='Path to the PDF template file')
-    parser.add_argument('output_pdf', help='Path for the output PDF file')
+    parser.add_argument(
+        'pdf_template', nargs='?', help='Path to the PDF template file (not used with --targets)'
+    )
+    parser.add_argument(
+        'output_pdf',
+        help='Path for the output PDF file, or the output folder with --batch or --targets',
+    )
+    parser.add_argument(
+        '--batch', action='store_true', help='Fill one PDF per row of a horizontal sheet'
+    )
+    parser.add_argument(
+        '--targets', action='store_true', help='Fill every template in EXCEL_TO_PDF.targets'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None, help='Number of worker processes for --batch'
+    )
     
     args = parser.parse_args()
+    if not args.targets and not args.pdf_template:
+        parser.error("pdf_template is required unless --targets is given")
     
     try:
-        excel_pdf(args.excel_file, args.pdf_template, args.output_pdf)
+        if args.targets:
+            excel_pdf_targets(args.excel_file, args.output_pdf)
+        elif args.batch:
+            excel_pdf_batch(args.excel_file, args.pdf_template, args.output_pdf, args.workers)
+        else:
+            excel_pdf(args.excel_file, args.pdf_template, args.output_pdf)
     except Exception as e:
         print(f"Error: {e}")
         return 1
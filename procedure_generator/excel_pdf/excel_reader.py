@@ -0,0 +1,87 @@
+from ..config_loader import config
+
+# Cell text pandas reads as missing by default, so both readers skip the same cells
+NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+def get_sheet_name():
+    # Use default sheet name from config, or first sheet if empty
+    sheet_name = config.excel_to_pdf.processing.default_sheet_name
+    if not sheet_name:  # If empty string, use first sheet
+        sheet_name = 0
+    return sheet_name
+
+def _is_missing(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return value != value
+    if isinstance(value, str):
+        return value in NA_VALUES
+    return False
+
+def _cell_value(value):
+    # pandas gives whole number floats as ints
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def read_vertical_sheet_with_openpyxl(excel_file: str) -> dict:
+    """
+    Stream the first two columns of the sheet with openpyxl in read only mode.
+
+    Gives the same keys and values as the pandas reader without importing pandas.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_file, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet_name = get_sheet_name()
+        if sheet_name == 0:
+            sheet = workbook.worksheets[0]
+        elif sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+        else:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+        excel_data = {}
+        max_columns = 0
+        for row in sheet.iter_rows(values_only=True):
+            max_columns = max(max_columns, len(row))
+            key = row[0] if row else None
+            value = row[1] if len(row) > 1 else None
+            if not _is_missing(key):
+                # Like dict(zip(...)), a later row with the same key replaces the earlier one
+                excel_data[_cell_value(key)] = None if _is_missing(value) else _cell_value(value)
+    finally:
+        workbook.close()
+
+    if max_columns < 2:
+        raise ValueError("Excel file must have at least 2 columns")
+
+    # Skip empty rows (always enabled)
+    return {k: v for k, v in excel_data.items() if v is not None}
+
+def read_vertical_sheet_with_pandas(excel_file: str) -> dict:
+    import pandas as pd
+
+    # Read Excel file without headers (first column as keys, second as values)
+    df = pd.read_excel(excel_file, sheet_name=get_sheet_name(), header=None)
+
+    # Convert to dictionary with first column as keys, second as values
+    if len(df.columns) >= 2:
+        excel_data = dict(zip(df[0], df[1]))
+    else:
+        raise ValueError("Excel file must have at least 2 columns")
+
+    # Skip empty rows (always enabled)
+    return {k: v for k, v in excel_data.items() if pd.notna(k) and pd.notna(v)}
+
+def read_vertical_sheet(excel_file: str) -> dict:
+    """Read a two column sheet of names and values into a dictionary"""
+    if config.excel_to_pdf.processing.reader == "pandas":
+        return read_vertical_sheet_with_pandas(excel_file)
+    return read_vertical_sheet_with_openpyxl(excel_file)
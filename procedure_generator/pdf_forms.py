@@ -0,0 +1,172 @@
+import fitz
+
+
+CHECKBOX_TYPES = (fitz.mupdf.PDF_WIDGET_TYPE_CHECKBOX, fitz.mupdf.PDF_WIDGET_TYPE_RADIOBUTTON)
+
+
+class FieldIndex:
+    """
+    Field name to widget index for an open PyMuPDF document.
+
+    Built with one pass over every widget, so looking up a field doesn't walk the whole
+    document again. Call insert_pages and add_widget to keep it current as pages are added.
+
+    A widget is only usable while its page is loaded, so the index keeps the pages it loaded
+    widgets from for as long as the index is in use.
+    """
+
+    def __init__(self, doc: fitz.Document):
+        self.doc = doc
+        # field name -> [(page number, position on page, widget xref)] in document order
+        self.fields: dict[str, list[tuple[int, int, int]]] = {}
+        self._pages: dict[int, fitz.Page] = {}
+        for page_number in range(doc.page_count):
+            for position, widget in enumerate(doc[page_number].widgets()):
+                self.add_widget(page_number, position, widget)
+
+    def add_widget(self, page_number: int, position: int, widget: fitz.Widget):
+        locations = self.fields.setdefault(widget.field_name or "", [])
+        locations.append((page_number, position, widget.xref))
+        locations.sort()
+
+    def insert_pages(self, start: int, count: int):
+        """Shift the index after count pages were inserted before page number start"""
+        for locations in self.fields.values():
+            for i, (page_number, position, xref) in enumerate(locations):
+                if page_number >= start:
+                    locations[i] = (page_number + count, position, xref)
+        # Loaded pages are keyed by page number, which just changed
+        self._pages.clear()
+
+    def page(self, page_number: int) -> fitz.Page:
+        page = self._pages.get(page_number)
+        if page is None:
+            page = self._pages[page_number] = self.doc[page_number]
+        return page
+
+    def page_widgets(self, field_name: str) -> list[tuple[fitz.Page, fitz.Widget]]:
+        """Return each widget of a field with the page it is on"""
+        result = []
+        for page_number, _, xref in self.fields.get(field_name, []):
+            page = self.page(page_number)
+            result.append((page, page.load_widget(xref)))
+        return result
+
+    def widgets(self, field_name: str) -> list[fitz.Widget]:
+        return [widget for _, widget in self.page_widgets(field_name)]
+
+    def find_last(self, starts_with: str) -> tuple[int, str | None]:
+        """Return the page number and name of the last field whose name has the prefix"""
+        last_location = None
+        field_name = None
+        for name, locations in self.fields.items():
+            if not name or not name.startswith(starts_with):
+                continue
+            # Later pages win, then later widgets on the same page
+            if last_location is None or locations[-1] > last_location:
+                last_location = locations[-1]
+                field_name = name
+
+        if last_location is None:
+            return 0, None
+        return last_location[0], field_name
+
+
+def open_pdf(pdf) -> tuple[fitz.Document, bool]:
+    """Return an open document for a path or document, and whether the caller must close it"""
+    if isinstance(pdf, fitz.Document):
+        return pdf, False
+    return fitz.open(pdf), True
+
+
+def _widget_value(widget: fitz.Widget) -> str:
+    value: object = widget.field_value
+    if value is None or value is False:
+        return "Off" if widget.field_type in CHECKBOX_TYPES else ""
+    if value is True:
+        on_state = widget.on_state()
+        return on_state if isinstance(on_state, str) and on_state else "Yes"
+    if isinstance(value, (list, tuple)):
+        # Multi-select list boxes
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+def read_form_fields(pdf) -> dict[str, str]:
+    """
+    Read every form field of a PDF in one pass over its widgets.
+
+    Values are strings like fillpdf's get_form_fields: text as entered, the state name for
+    check boxes and radio buttons ("Off" when unchecked) and the selected choice for lists.
+    """
+    doc, close = open_pdf(pdf)
+    try:
+        fields = {}
+        for page in doc:
+            for widget in page.widgets():
+                if not widget.field_name:
+                    continue
+                value = _widget_value(widget)
+                # Only the selected button of a radio group carries the group's value
+                if widget.field_type == fitz.mupdf.PDF_WIDGET_TYPE_RADIOBUTTON and value == "Off":
+                    fields.setdefault(widget.field_name, value)
+                else:
+                    fields[widget.field_name] = value
+        return fields
+    finally:
+        if close:
+            doc.close()
+
+
+# Extracts the data from a pdf into a dictionary
+def extract_fillable_data(pdf) -> dict:
+    fields = read_form_fields(pdf)
+    fields = {k: v for k, v in fields.items() if "check box" not in k.lower()}
+
+    return fields
+
+
+def write_form_fields(doc: fitz.Document, data, field_index: FieldIndex | None = None):
+    """
+    Set the value of every widget named in the data.
+
+    Check boxes are checked by their on state name or by yes/true/1/on, and radio buttons
+    are selected by their on state name. Everything else is set as text.
+    """
+    field_index = field_index or FieldIndex(doc)
+    for field_name in field_index.fields.keys() & data.keys():
+        value = data[field_name]
+        if value is None:
+            continue
+
+        for widget in field_index.widgets(field_name):
+            if widget.field_type in CHECKBOX_TYPES:
+                on_state = widget.on_state()
+                checked = value is True or str(value) == str(on_state) or (
+                    str(value).lower() in ["yes", "true", "1", "on"]
+                )
+                if widget.field_type == fitz.mupdf.PDF_WIDGET_TYPE_RADIOBUTTON and not checked:
+                    # Leave the other buttons of a radio group to the matching one
+                    continue
+                widget.field_value = on_state if checked else "Off"  # type: ignore
+            else:
+                widget.field_value = str(value)  # type: ignore
+            widget.update()
+
+
+def fill_pdf(pdf_template, output_pdf, data):
+    """
+    Fill a PDF form and save it, replacing fillpdf's write_fillable_pdf.
+
+    The template is a path, or the bytes of a template already read into memory.
+    """
+    if isinstance(pdf_template, bytes):
+        doc = fitz.open(stream=pdf_template, filetype="pdf")
+    else:
+        doc = fitz.open(pdf_template)
+    try:
+        write_form_fields(doc, data)
+        doc.save(output_pdf, deflate=True)
+    finally:
+        doc.close()
+
@@ -2,11 +2,13 @@
 
 import sys
 import codecs
+import multiprocessing
 from gooey import Gooey, GooeyParser
-from procedure_generator.swp.swp import generate_pdf, update_master
+from procedure_generator.swp.swp import generate_pdf, generate_pdfs, update_master
 from procedure_generator.worksafe_nop.fill import fill_nop, fill_nop_from_pdf
+from procedure_generator.worksafe_nop.export import export_swp_data
 from procedure_generator.config_loader import config
-from procedure_generator.excel_pdf.excel_pdf import excel_pdf
+from procedure_generator.excel_pdf.excel_pdf import excel_pdf, excel_pdf_batch, excel_pdf_targets
 
 
 # Handle encodings
@@ -21,6 +23,7 @@ def setDebug(args):
     args.source_pdf = config.debug_paths.source_pdf
     args.template_folder = config.debug_paths.template_folder
     args.work_procedure_folder = config.debug_paths.work_procedure_folder
+    args.in_place = False
     return args
 
 
@@ -85,6 +88,69 @@ def main():
         gooey_options={'wildcard': "PDF files (*.pdf)|*.pdf"}
     )
 
+    excel_batch_group = subparsers.add_parser(
+        "Excel_PDF_Batch",
+        prog="Excel PDF Batch",
+        help="Fill a PDF form for every row of an Excel sheet",
+        description="Fill one PDF per row of an Excel sheet whose column headers are the field mappings"
+    )
+
+    excel_batch_options = excel_batch_group.add_argument_group(
+        'Excel to PDF Batch',
+        description='Fill a PDF for each record of a horizontal sheet',
+        gooey_options={'show_border': False, 'columns': 1}
+    )
+    excel_batch_options.add_argument(
+        'excel_file',
+        widget='FileChooser',
+        help="Excel file with one record per row",
+        gooey_options={'wildcard': "Excel files (*.xlsx)|*.xlsx"}
+    )
+    excel_batch_options.add_argument(
+        'pdf_template',
+        widget='FileChooser',
+        help="PDF form to fill",
+        gooey_options={'wildcard': "PDF files (*.pdf)|*.pdf"}
+    )
+    excel_batch_options.add_argument(
+        'output_folder',
+        widget='DirChooser',
+        help="Folder to save the filled PDFs in"
+    )
+    excel_batch_options.add_argument(
+        "--workers",
+        metavar="Workers",
+        widget="IntegerField",
+        type=int,
+        default=config.excel_to_pdf.processing.batch_workers,
+        gooey_options={"min": 0, "max": 64},
+        help="Number of PDFs to fill at once (0 uses one per CPU)",
+    )
+
+    excel_targets_group = subparsers.add_parser(
+        "Excel_PDF_Targets",
+        prog="Excel PDF Targets",
+        help="Fill several PDF forms from one Excel record",
+        description="Fill every PDF form set up in EXCEL_TO_PDF.targets from one Excel record"
+    )
+
+    excel_targets_options = excel_targets_group.add_argument_group(
+        'Excel to PDF Targets',
+        description='Fill each target PDF from the same Excel data',
+        gooey_options={'show_border': False, 'columns': 1}
+    )
+    excel_targets_options.add_argument(
+        'excel_file',
+        widget='FileChooser',
+        help="Excel file with vertical data",
+        gooey_options={'wildcard': "Excel files (*.xlsx)|*.xlsx"}
+    )
+    excel_targets_options.add_argument(
+        'output_folder',
+        widget='DirChooser',
+        help="Folder to save the filled PDFs in"
+    )
+
     generator_group = subparsers.add_parser(
         "Generate_PDF", prog="Generate PDF", help="Generate a PDF from a template"
     )
@@ -118,6 +184,64 @@ def main():
         gooey_options={"default_path": default_work_procedure_folder, "full_width": True},
         help="The folder containing the work procedure documents",
     )
+    generator_options.add_argument(
+        "--force",
+        action="store_true",
+        widget="CheckBox",
+        help="Regenerate even if the inputs are unchanged",
+    )
+
+    batch_group = subparsers.add_parser(
+        "Generate_PDF_Batch",
+        prog="Generate PDF Batch",
+        help="Generate PDFs for a folder of work orders",
+    )
+
+    batch_options = batch_group.add_argument_group(
+        'Generate PDF Batch',
+        description='Create a SWP for every work order in a folder',
+        gooey_options={'show_border': False, 'columns': 1}
+    )
+
+    batch_options.add_argument(
+        "--source",
+        metavar="Source Folder",
+        widget="DirChooser",
+        gooey_options={"full_width": True},
+        help="The folder of source PDFs, or a glob pattern such as C:\\Orders\\*.pdf",
+        required=True,
+    )
+    batch_options.add_argument(
+        "--template_folder",
+        metavar="Template Folder",
+        widget="DirChooser",
+        help="The folder containing the template PDFs",
+        default=default_template_folder,
+        gooey_options={"default_path": default_template_folder, "full_width": True},
+    )
+    batch_options.add_argument(
+        "--work_procedure_folder",
+        metavar="Work Procedure Folder",
+        widget="DirChooser",
+        default=default_work_procedure_folder,
+        gooey_options={"default_path": default_work_procedure_folder, "full_width": True},
+        help="The folder containing the work procedure documents",
+    )
+    batch_options.add_argument(
+        "--workers",
+        metavar="Workers",
+        widget="IntegerField",
+        type=int,
+        default=config.generation.batch_workers,
+        gooey_options={"min": 0, "max": 64},
+        help="Number of PDFs to generate at once (0 uses one per CPU)",
+    )
+    batch_options.add_argument(
+        "--force",
+        action="store_true",
+        widget="CheckBox",
+        help="Regenerate even if the inputs are unchanged",
+    )
 
     fill_nop_group = subparsers.add_parser(
         "Fill_NOP",
@@ -140,6 +264,48 @@ def main():
         required=True,
     )
 
+    export_group = subparsers.add_parser(
+        "Export_SWP_Data",
+        prog="Export SWP Data",
+        help="Export the data of a folder of SWPs for reporting",
+        description="Export the form data and risk level of every SWP in a folder",
+    )
+
+    export_options = export_group.add_argument_group(
+        'Export SWP Data',
+        description='Export SWP data to a JSONL, CSV or Parquet file',
+        gooey_options={'show_border': False, 'columns': 1}
+    )
+    export_options.add_argument(
+        "--source",
+        metavar="SWP Folder",
+        widget="DirChooser",
+        gooey_options={"full_width": True},
+        help="The folder of SWP PDFs, or a glob pattern such as C:\\Orders\\*_SWP.pdf",
+        required=True,
+    )
+    export_options.add_argument(
+        "--output",
+        metavar="Output File",
+        widget="FileSaver",
+        gooey_options={
+            "wildcard": "JSON Lines (*.jsonl)|*.jsonl|CSV files (*.csv)|*.csv|"
+            "Parquet files (*.parquet)|*.parquet",
+            "full_width": True,
+        },
+        help="Save the exported data as...",
+        required=True,
+    )
+    export_options.add_argument(
+        "--workers",
+        metavar="Workers",
+        widget="IntegerField",
+        type=int,
+        default=config.nop.export.workers,
+        gooey_options={"min": 0, "max": 64},
+        help="Number of SWPs to read at once (0 uses one per CPU)",
+    )
+
     procedure_group = subparsers.add_parser(
         "Update_Master",
         prog="Update Master",
@@ -173,6 +339,12 @@ def main():
         gooey_options={"default_path": default_work_procedure_folder, "full_width": True},
         help="The folder containing the work procedure documents",
     )
+    procedure_options.add_argument(
+        "--in_place",
+        action="store_true",
+        widget="CheckBox",
+        help="Update the master PDF itself instead of creating an _UPDATED copy",
+    )
     
     args = parser.parse_args()
 
@@ -183,24 +355,48 @@ def main():
         source_pdf = args.source_pdf
         template_folder = args.template_folder
         work_procedure_folder = args.work_procedure_folder
-        generate_pdf(source_pdf, template_folder, work_procedure_folder)
+        generate_pdf(source_pdf, template_folder, work_procedure_folder, force=args.force)
+    elif args.action == "Generate_PDF_Batch":
+        generate_pdfs(
+            args.source,
+            args.template_folder,
+            args.work_procedure_folder,
+            args.workers,
+            args.force,
+        )
     elif args.action == "Update_Master":
         source_pdf = args.source_pdf
         template_folder = args.template_folder
         work_procedure_folder = args.work_procedure_folder
-        update_master(source_pdf, template_folder, work_procedure_folder)
+        update_master(source_pdf, template_folder, work_procedure_folder, args.in_place)
     elif args.action == "Fill_NOP":
         data_file = args.swp_data_file
         fill_nop_from_pdf(data_file)
+    elif args.action == "Export_SWP_Data":
+        export_swp_data(args.source, args.output, args.workers)
     elif args.action == "Excel_PDF":
         excel_pdf(
             excel_file=args.excel_file,
             pdf_template=args.pdf_template,
             output_pdf=args.output_pdf
         )
+    elif args.action == "Excel_PDF_Targets":
+        excel_pdf_targets(
+            excel_file=args.excel_file,
+            output_folder=args.output_folder
+        )
+    elif args.action == "Excel_PDF_Batch":
+        excel_pdf_batch(
+            excel_file=args.excel_file,
+            pdf_template=args.pdf_template,
+            output_folder=args.output_folder,
+            workers=args.workers
+        )
 
 
 if __name__ == "__main__":
+    # Needed for the batch process pool in the PyInstaller build
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception as e:
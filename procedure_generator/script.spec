@@ -6,7 +6,7 @@ a = Analysis(
     pathex=['.'],
     binaries=[],
     datas=[],
-    hiddenimports=['worksafe_nop', 'worksafe_nop.fill', 'worksafe_nop.handlers', 'worksafe_nop.pdf_to_data'],
+    hiddenimports=['worksafe_nop', 'worksafe_nop.fill', 'worksafe_nop.handlers', 'worksafe_nop.pdf_to_data', 'pyarrow'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
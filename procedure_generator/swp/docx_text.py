@@ -0,0 +1,111 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+import docx
+
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+PACKAGE_RELATIONSHIPS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+OFFICE_DOCUMENT = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+
+DOCUMENT = W + "document"
+BODY = W + "body"
+PARAGRAPH = W + "p"
+RUN = W + "r"
+HYPERLINK = W + "hyperlink"
+
+# Text python-docx gives each run child, the break type decides what w:br becomes
+RUN_TEXT = {
+    W + "tab": "\t",
+    W + "ptab": "\t",
+    W + "cr": "\n",
+    W + "noBreakHyphen": "-",
+}
+BREAK = W + "br"
+BREAK_TYPE = W + "type"
+TEXT = W + "t"
+
+
+def _main_document_part(archive: zipfile.ZipFile) -> str:
+    try:
+        relationships = ET.fromstring(archive.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+
+    for relationship in relationships.iter(PACKAGE_RELATIONSHIPS + "Relationship"):
+        if relationship.get("Type") == OFFICE_DOCUMENT:
+            return posixpath.normpath(relationship.get("Target", "").lstrip("/"))
+    return "word/document.xml"
+
+
+def _is_run_child(path) -> bool:
+    # Runs directly in a body paragraph, or in a hyperlink directly in a body paragraph
+    if len(path) == 5:
+        return path[3] == RUN
+    if len(path) == 6:
+        return path[3] == HYPERLINK and path[4] == RUN
+    return False
+
+
+def iter_paragraph_texts(file_path):
+    """
+    Stream the text of each body paragraph straight from word/document.xml.
+
+    Gives the same text as python-docx's paragraph.text without building its object model:
+    only runs directly in a paragraph or its hyperlinks count, and tabs, breaks and
+    non-breaking hyphens are translated the same way.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open(_main_document_part(archive)) as xml_file:
+            path = []
+            parts = None
+            found_body = False
+            for event, element in ET.iterparse(xml_file, events=("start", "end")):
+                if event == "start":
+                    path.append(element.tag)
+                    if len(path) == 2 and path == [DOCUMENT, BODY]:
+                        found_body = True
+                    elif len(path) == 3 and path[1] == BODY and element.tag == PARAGRAPH:
+                        parts = []
+                    continue
+
+                if parts is not None and _is_run_child(path):
+                    if element.tag == TEXT:
+                        parts.append(element.text or "")
+                    elif element.tag == BREAK:
+                        if element.get(BREAK_TYPE, "textWrapping") == "textWrapping":
+                            parts.append("\n")
+                    elif element.tag in RUN_TEXT:
+                        parts.append(RUN_TEXT[element.tag])
+
+                if len(path) == 3:
+                    if parts is not None:
+                        yield "".join(parts)
+                        parts = None
+                    # Body children are done with, so don't keep them in memory
+                    element.clear()
+
+                path.pop()
+
+    if not found_body:
+        raise ValueError(f"No document body found in {file_path}")
+
+
+def read_docx_text_with_python_docx(file_path) -> str:
+    doc = docx.Document(file_path)
+    result = []
+    for paragraph in doc.paragraphs:
+        result.append(paragraph.text)
+    return "\n".join(result)
+
+
+def read_docx_text(file_path) -> str:
+    """Return the paragraph text of a word document, one line per paragraph"""
+    try:
+        return "\n".join(iter_paragraph_texts(file_path))
+    except Exception as e:
+        print(f"Reading {file_path} with python-docx instead: {e}")
+        return read_docx_text_with_python_docx(file_path)
+
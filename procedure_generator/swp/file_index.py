@@ -0,0 +1,131 @@
+import os
+from procedure_generator.cache import cache_key, get_cache_folder, read_json, write_json
+from procedure_generator.config_loader import config
+from procedure_generator.swp.folder_scan import list_directory, scan_tree
+
+
+INDEX_VERSION = 1
+
+# Indexes already loaded by this process, keyed by normalized root folder
+_loaded_indexes = {}
+
+
+class FolderIndex:
+    """
+    Filename to path index of every file below a folder.
+
+    The index stores each directory with its modification time, file names and subdirectory
+    names. It is saved in the cache folder so later runs only need to stat the directories
+    and re-list the ones that changed, instead of walking the whole tree again.
+    """
+
+    def __init__(self, root: str, dirs: dict):
+        self.root = root
+        self.dirs = dirs
+        self._paths_by_name = None
+
+    def walk(self):
+        """Yield (dirpath, filenames) in the same top-down order as os.walk"""
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            entry = self.dirs.get(rel_dir)
+            if entry is None:
+                continue
+            yield os.path.join(self.root, rel_dir) if rel_dir else self.root, entry["files"]
+            stack.extend(os.path.join(rel_dir, name) for name in reversed(entry["subdirs"]))
+
+    def paths_by_name(self) -> dict[str, list[str]]:
+        if self._paths_by_name is None:
+            paths_by_name = {}
+            for dirpath, filenames in self.walk():
+                for filename in filenames:
+                    paths_by_name.setdefault(filename, []).append(os.path.join(dirpath, filename))
+            self._paths_by_name = paths_by_name
+        return self._paths_by_name
+
+    def names_with_extension(self, file_extension) -> list[str]:
+        return [
+            filename
+            for _, filenames in self.walk()
+            for filename in filenames
+            if filename.endswith(file_extension)
+        ]
+
+    def find(self, search_filename) -> str:
+        return self.find_all([search_filename])[search_filename]
+
+    def find_all(self, search_filenames) -> dict[str, str]:
+        """
+        Resolve several file names at once.
+
+        Raises a single exception listing every name that is missing or duplicated.
+        """
+        paths_by_name = self.paths_by_name()
+        found = {}
+        errors = []
+        for search_filename in dict.fromkeys(search_filenames):
+            matches = paths_by_name.get(search_filename, [])
+            if len(matches) > 1:
+                errors.append(f"More than one file named {search_filename} was found!")
+            elif len(matches) == 0:
+                errors.append(f"No file named {search_filename} was found!")
+            else:
+                found[search_filename] = matches[0]
+
+        if errors:
+            raise Exception("\n".join(errors))
+
+        return found
+
+
+def _refresh_dirs(root, cached_dirs) -> dict:
+    def visit(rel_dir, mtime):
+        path = os.path.join(root, rel_dir) if rel_dir else root
+        if mtime is None:
+            try:
+                # Stat before listing so a change during the listing is picked up next time
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+
+        entry = cached_dirs.get(rel_dir)
+        if entry and entry.get("mtime") == mtime:
+            return entry, {}
+
+        files, subdirs, subdir_mtimes = list_directory(path)
+        return {"mtime": mtime, "files": files, "subdirs": subdirs}, subdir_mtimes
+
+    return scan_tree(visit, config.generation.folder_scan_threads)
+
+
+def _index_file_path(root):
+    return get_cache_folder("folder_index") / f"{cache_key(os.path.normcase(root))}.json"
+
+
+def load_folder_index(folder) -> FolderIndex:
+    """Return the index for a folder, refreshing the saved index from directory mtimes"""
+    root = os.path.abspath(folder)
+    key = os.path.normcase(root)
+    if key in _loaded_indexes:
+        return _loaded_indexes[key]
+
+    cached_dirs = {}
+    index_path = None
+    if config.cache.enabled:
+        try:
+            index_path = _index_file_path(root)
+            saved = read_json(index_path)
+            if saved and saved.get("version") == INDEX_VERSION and saved.get("root") == root:
+                cached_dirs = saved.get("dirs", {})
+        except OSError:
+            index_path = None
+
+    dirs = _refresh_dirs(root, cached_dirs)
+
+    if index_path and dirs != cached_dirs:
+        write_json(index_path, {"version": INDEX_VERSION, "root": root, "dirs": dirs})
+
+    index = FolderIndex(root, dirs)
+    _loaded_indexes[key] = index
+    return index
@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def list_directory(path) -> tuple[list[str], list[str], dict[str, int]]:
+    """
+    List a directory with os.scandir.
+
+    Returns the file names, the subdirectory names and the subdirectory mtimes. The mtimes
+    come from the DirEntry stat info, which Windows fills in from the listing itself, so
+    the subdirectories don't need to be stat'ed again.
+    """
+    files = []
+    subdirs = []
+    subdir_mtimes = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # Linked folders are skipped. os.walk lists them but doesn't follow them,
+                    # so the files found are the same, and listed subdirectories are visited
+                    if entry.is_symlink():
+                        continue
+                    subdirs.append(entry.name)
+                    try:
+                        subdir_mtimes[entry.name] = entry.stat().st_mtime_ns
+                    except OSError:
+                        pass
+                else:
+                    files.append(entry.name)
+    except OSError:
+        pass
+    return files, subdirs, subdir_mtimes
+
+
+def scan_tree(visit, max_workers) -> dict[str, dict]:
+    """
+    Visit every directory of a tree, fanning the subdirectories out across a thread pool.
+
+    visit(rel_dir, hint) is called for the root ("") and each subdirectory, with the hint
+    its parent returned for it (or None). It returns None to skip the directory, or an
+    (entry, hints) tuple where entry["subdirs"] lists the subdirectories to visit next and
+    hints maps subdirectory names to their hints. Returns the entries by relative path.
+    """
+    entries = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(visit, "", None): ""}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_dir = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    continue
+
+                entry, hints = result
+                entries[rel_dir] = entry
+                for name in entry["subdirs"]:
+                    subdir = os.path.join(rel_dir, name)
+                    pending[executor.submit(visit, subdir, hints.get(name))] = subdir
+
+    return entries
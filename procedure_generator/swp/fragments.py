@@ -0,0 +1,46 @@
+import fitz
+from procedure_generator.swp.pagination import FIELD_PADDING, LINE_HEIGHT, FieldLayout
+
+
+# Smallest font size used when a page of text has to shrink to fit
+MIN_FONT_SIZE = 6.0
+
+
+def render_text_pages(pages: list[str], layout: FieldLayout) -> bytes:
+    """
+    Render each page of text to a PDF page the size of the SWP text field.
+
+    The pages are drawn as page content in the field's font, so they can be shown on the
+    SWP pages instead of filling the text fields.
+    """
+    doc = fitz.open()
+    try:
+        for text in pages:
+            page = doc.new_page(width=layout.width, height=layout.height)  # type: ignore
+            rect = page.rect + (FIELD_PADDING, FIELD_PADDING, -FIELD_PADDING, -FIELD_PADDING)
+
+            # insert_textbox writes nothing if the text overflows, so shrink until it fits
+            fontsize = layout.fontsize
+            while True:
+                result = page.insert_textbox(
+                    rect,
+                    text,
+                    fontname=layout.fontname,
+                    fontsize=fontsize,
+                    lineheight=LINE_HEIGHT,
+                )
+                if result >= 0 or fontsize <= MIN_FONT_SIZE:
+                    break
+                fontsize = max(MIN_FONT_SIZE, fontsize - 0.5)
+
+        # garbage takes a level from 0 to 4, though it is typed as a bool
+        return doc.tobytes(garbage=3, deflate=True)  # type: ignore
+    finally:
+        doc.close()
+
+
+def show_fragment_page(page: fitz.Page, widget: fitz.Widget, fragment: fitz.Document, pno):
+    """Replace a text field with a rendered fragment page drawn in the same place"""
+    rect = widget.rect
+    page.delete_widget(widget)  # type: ignore
+    page.show_pdf_page(rect, fragment, pno)  # type: ignore
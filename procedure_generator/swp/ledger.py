@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import time
+
+
+LEDGER_FILENAME = "swp_ledger.sqlite"
+
+
+class GenerationLedger:
+    """
+    Record of the SWPs generated in a folder and the inputs they were generated from.
+
+    Each output is stored with a key hashed from its source fields, template and procedure
+    files, along with its own size and mtime so an output that was edited or deleted since
+    it was generated is never reused. Ledger errors are treated as a miss.
+    """
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, LEDGER_FILENAME)
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                "output_path TEXT PRIMARY KEY, key TEXT, size INTEGER, mtime INTEGER, "
+                "created REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS outputs_key ON outputs (key)")
+            self._connection = connection
+        return self._connection
+
+    def find(self, output_pdf, key) -> str | None:
+        """
+        Return an unchanged output generated from the same inputs.
+
+        The requested output itself is preferred, otherwise any other output with the key.
+        """
+        output_pdf = os.path.abspath(output_pdf)
+        try:
+            rows = self._connect().execute(
+                "SELECT output_path, size, mtime FROM outputs WHERE key = ? "
+                "ORDER BY output_path = ? DESC, created DESC",
+                (key, output_pdf),
+            ).fetchall()
+        except sqlite3.Error:
+            return None
+
+        for output_path, size, mtime in rows:
+            try:
+                stat = os.stat(output_path)
+            except OSError:
+                continue
+            if stat.st_size == size and stat.st_mtime_ns == mtime:
+                return output_path
+        return None
+
+    def record(self, output_pdf, key):
+        output_pdf = os.path.abspath(output_pdf)
+        try:
+            stat = os.stat(output_pdf)
+            self._connect().execute(
+                "INSERT OR REPLACE INTO outputs (output_path, key, size, mtime, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (output_pdf, key, stat.st_size, stat.st_mtime_ns, time.time()),
+            )
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: Could not update {self.path}: {e}")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,157 @@
+import re
+from typing import Iterator, NamedTuple
+import fitz
+from procedure_generator.pdf_forms import FieldIndex
+
+
+# Space between the field border and its text, on each side, in points
+FIELD_PADDING = 4.0
+
+# Line spacing of multi-line text fields as a multiple of the font size
+LINE_HEIGHT = 1.2
+
+# Base 14 font names PyMuPDF can measure, by the name a form field's default appearance
+# gives the font: the AcroForm abbreviation, like HeBo for Helvetica Bold, or the full font
+# name. Any other font is measured as Helvetica.
+FIELD_FONTS = {
+    "helv": "helv",
+    "heit": "heit",
+    "hebo": "hebo",
+    "hebi": "hebi",
+    "tiro": "tiro",
+    "tiit": "tiit",
+    "tibo": "tibo",
+    "tibi": "tibi",
+    "cour": "cour",
+    "coit": "coit",
+    "cobo": "cobo",
+    "cobi": "cobi",
+    "symb": "symb",
+    "zadb": "zadb",
+    "helvetica": "helv",
+    "helvetica-oblique": "heit",
+    "helvetica-bold": "hebo",
+    "helvetica-boldoblique": "hebi",
+    "times-roman": "tiro",
+    "times-italic": "tiit",
+    "times-bold": "tibo",
+    "times-bolditalic": "tibi",
+    "courier": "cour",
+    "courier-oblique": "coit",
+    "courier-bold": "cobo",
+    "courier-boldoblique": "cobi",
+    "symbol": "symb",
+    "zapfdingbats": "zadb",
+}
+
+WORD_PATTERN = re.compile(r"\S+\s*")
+
+
+class FieldLayout(NamedTuple):
+    width: float
+    height: float
+    fontname: str
+    fontsize: float
+
+
+def measure_text_field(doc: fitz.Document, field_name) -> FieldLayout | None:
+    """Return the size and font of a text field, or None if it can't be measured"""
+    widgets = FieldIndex(doc).widgets(field_name)
+    if not widgets:
+        return None
+
+    widget = widgets[0]
+    rect = widget.rect
+    # A font size of 0 means auto sized text, which shrinks to fit anything
+    if rect is None or not widget.text_fontsize:
+        return None
+
+    fontname = FIELD_FONTS.get((widget.text_font or "").lower(), "helv")
+    return FieldLayout(rect.width, rect.height, fontname, widget.text_fontsize)
+
+
+class _TextMeasure:
+    def __init__(self, layout: FieldLayout):
+        self.layout = layout
+        self.char_widths = {}
+
+    def width(self, text) -> float:
+        total = 0.0
+        for char in text:
+            char_width = self.char_widths.get(char)
+            if char_width is None:
+                char_width = fitz.get_text_length(
+                    char, fontname=self.layout.fontname, fontsize=self.layout.fontsize
+                )
+                self.char_widths[char] = char_width
+            total += char_width
+        return total
+
+
+def wrap_line(line, max_width, measure: _TextMeasure) -> list[tuple[int, int]]:
+    """
+    Wrap one line of text to the width, returning the (start, end) offsets of each wrapped
+    line. Lines break between words, and words wider than the field break between characters.
+    """
+    spans = []
+    line_start = 0
+    line_width = 0.0
+    leading_space = len(line) - len(line.lstrip())
+
+    for match in WORD_PATTERN.finditer(line):
+        # The first word keeps the indent in front of it
+        start = 0 if match.start() == leading_space else match.start()
+        word = line[start:match.end()]
+        word_width = measure.width(word.rstrip())
+
+        if line_width + word_width > max_width and start > line_start:
+            spans.append((line_start, start))
+            line_start = start
+            line_width = 0.0
+
+        if word_width > max_width:
+            # Break a word that doesn't fit on a line of its own
+            for position in range(start, match.end()):
+                char_width = measure.width(line[position])
+                if line_width + char_width > max_width and position > line_start:
+                    spans.append((line_start, position))
+                    line_start = position
+                    line_width = 0.0
+                line_width += char_width
+        else:
+            line_width += measure.width(word)
+
+    spans.append((line_start, len(line)))
+    return spans
+
+
+def iter_text_pages(text, layout: FieldLayout) -> Iterator[str]:
+    """
+    Lazily split text into pages that fill a text field.
+
+    Each line is wrapped to the field width with the field's font, and as many wrapped lines
+    as fit the field height go on each page. A line that doesn't fit is continued on the
+    next page.
+    """
+    measure = _TextMeasure(layout)
+    max_width = layout.width - 2 * FIELD_PADDING
+    line_height = layout.fontsize * LINE_HEIGHT
+    lines_per_page = max(1, int((layout.height - 2 * FIELD_PADDING) // line_height))
+
+    page_lines = []
+    used_lines = 0
+    for line in text.split("\n"):
+        spans = wrap_line(line, max_width, measure)
+        while spans:
+            if used_lines == lines_per_page:
+                yield "\n".join(page_lines).rstrip()
+                page_lines = []
+                used_lines = 0
+
+            fitting = spans[: lines_per_page - used_lines]
+            spans = spans[len(fitting):]
+            page_lines.append(line[fitting[0][0]:fitting[-1][1]])
+            used_lines += len(fitting)
+
+    if page_lines:
+        yield "\n".join(page_lines).rstrip()
@@ -1,8 +1,19 @@
-from fillpdf import fillpdfs
-import docx
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import hashlib
+import json
 import os
+import shutil
+import tempfile
 import fitz
+from procedure_generator.cache import DiskCache, cache_key, file_identity
 from procedure_generator.config_loader import config
+from procedure_generator.pdf_forms import FieldIndex, extract_fillable_data, write_form_fields
+from procedure_generator.swp.docx_text import read_docx_text
+from procedure_generator.swp.fragments import render_text_pages, show_fragment_page
+from procedure_generator.swp.file_index import load_folder_index
+from procedure_generator.swp.ledger import GenerationLedger
+from procedure_generator.swp.pagination import FieldLayout, iter_text_pages, measure_text_field
 
 
 # Field configuration
@@ -12,13 +23,28 @@ work_procedure_select_all_field = config.field_names.work_procedure_select_all_f
 work_procedure_text_field = config.field_names.work_procedure_text_field
 num_work_procedure_fields = config.field_names.num_work_procedure_fields
 
+# Extracted procedure text, shared between runs and within this run
+procedure_text_cache = DiskCache(
+    "procedure_text", max_entries=config.cache.procedure_text_max_entries
+)
+_procedure_pages = {}
 
-# Extracts the data from a pdf into a dictionary
-def extract_fillable_data(pdf_path) -> dict:
-    fields = fillpdfs.get_form_fields(pdf_path)
-    fields = {k: v for k, v in fields.items() if "check box" not in k.lower()}
+# Size and font of each template's SWP text field
+field_layout_cache = DiskCache("field_layouts", max_entries=config.cache.field_layout_max_entries)
 
-    return fields
+# Templates with their SWP pages already added, keyed by template file and page count
+expanded_template_cache = DiskCache(
+    "expanded_templates",
+    max_entries=config.cache.expanded_template_max_entries,
+    max_bytes=config.cache.expanded_template_max_mb * 1024 * 1024,
+)
+
+# Procedure pages rendered to PDF, keyed by procedure file and SWP field layout
+procedure_fragment_cache = DiskCache(
+    "procedure_fragments",
+    max_entries=config.cache.procedure_fragment_max_entries,
+    max_bytes=config.cache.procedure_fragment_max_mb * 1024 * 1024,
+)
 
 
 # Gets the value of a field from the dictionary of fields
@@ -37,47 +63,71 @@ def get_pdf_file(file_name, template_folder) -> str:
 
 
 def get_single_filepath_from_folder(base_folder, search_filename):
-    matches = []
-    file_path = search_filename
-
-    # Walk through all subdirectories of the base folder
-    for dirpath, dirnames, filenames in os.walk(base_folder):
-        for filename in filenames:
-            if filename == search_filename:
-                matches.append(os.path.join(dirpath, filename))
-
-    # Check if more than one file with the target name was found
-    if len(matches) > 1:
-        raise Exception(f"More than one file named {search_filename} was found!")
-    elif len(matches) == 0:
-        raise Exception(f"No file named {search_filename} was found!")
-    else:
-        file_path = matches[0]
-
-    return file_path
+    return load_folder_index(base_folder).find(search_filename)
 
 
 # Returns the data array from a word file
 def get_data_from_word_file(file_name, work_procedure_folder) -> list[str]:
     file_name_docx = f"{file_name}.docx"
     file_path = get_single_filepath_from_folder(work_procedure_folder, file_name_docx)
+    return get_data_from_word_path(file_path)
+
+
+# Returns the data array from a word file path
+def get_data_from_word_path(file_path, layout: FieldLayout | None = None) -> list[str]:
+    key = cache_key(*file_identity(file_path))
+
+    # A procedure selected in more than one slot is only read once per run
+    if (key, layout) not in _procedure_pages:
+        text = get_text_from_word_file(file_path, key)
+
+        # Split the text into pages, filling the SWP field when its size is known
+        if layout:
+            _procedure_pages[key, layout] = list(iter_text_pages(text, layout))
+        else:
+            _procedure_pages[key, layout] = split_text_into_pages(text, 3300)
+
+    return list(_procedure_pages[key, layout])
+
+
+# Returns the size and font of the template's SWP field, or None to split pages by characters
+def get_swp_field_layout(template_pdf) -> FieldLayout | None:
+    if not config.generation.layout_pagination:
+        return None
+
+    key = cache_key(*file_identity(template_pdf))
+    cached = field_layout_cache.get_json(key)
+    if cached is not None:
+        return FieldLayout(*cached["layout"]) if cached["layout"] else None
+
+    doc = fitz.open(template_pdf)
+    try:
+        layout = measure_text_field(doc, work_procedure_text_field.replace("X", ""))
+    finally:
+        doc.close()
+
+    field_layout_cache.put_json(key, {"layout": layout})
+    return layout
+
+
+# Returns the text of a word document, using the procedure text cache when the file is unchanged
+def get_text_from_word_file(file_path, key) -> str:
+    cached = procedure_text_cache.get_json(key)
+    if cached is not None:
+        return cached["text"]
 
     # Get the text from a word document
-    doc = docx.Document(file_path)
-    result = []
-    for paragraph in doc.paragraphs:
-        result.append(paragraph.text)
-    text = "\n".join(result)
+    text = read_docx_text(file_path)
 
-    # Split the text into pages
-    return split_text_into_pages(text, 3300)
+    procedure_text_cache.put_json(key, {"text": text})
+    return text
 
 
 # Splits text into pages
 def split_text_into_pages(text, max_chars_per_page):
     lines = text.split("\n")
     pages = []
-    current_page = ""
+    current_page = []
     current_page_chars = 0
 
     for line in lines:
@@ -87,34 +137,24 @@ def split_text_into_pages(text, max_chars_per_page):
         # Check if adding this line will exceed the page character limit
         if current_page_chars + line_length > max_chars_per_page:
             # Save the current page and start a new one
-            pages.append(current_page.rstrip())
-            current_page = ""
+            pages.append("\n".join(current_page).rstrip())
+            current_page = []
             current_page_chars = 0
 
         # Add the line to the current page
-        current_page += line + "\n"
+        current_page.append(line)
         current_page_chars += line_length
 
     # Add the last page if it's not empty
     if current_page:
-        pages.append(current_page.rstrip())
+        pages.append("\n".join(current_page).rstrip())
 
     return pages
 
 
-def _find_last_annot(doc, starts_with):
-    last_page_index = 0
-    field_name = None
-    for page_index, page in enumerate(doc):
-        for annot in page.widgets():
-            if annot.field_name.startswith(starts_with):
-                last_page_index = page_index
-                field_name = annot.field_name
-    return last_page_index, field_name
-
-
-def find_last_swp_page(doc):
-    page_index, field_name = _find_last_annot(doc, "SWP")
+def find_last_swp_page(doc, field_index: FieldIndex | None = None):
+    field_index = field_index or FieldIndex(doc)
+    page_index, field_name = field_index.find_last("SWP")
     last_swp_index = 0
 
     if field_name is None:
@@ -126,66 +166,133 @@ def find_last_swp_page(doc):
     return page_index, last_swp_index
 
 
-def add_swp_page(doc: fitz.Document, page_index, swp_index):
-    doc.fullcopy_page(page_index - 1, page_index)
-    new_page: fitz.Page = doc[page_index]
-    for annot in new_page.widgets():
-        if annot.field_name and annot.field_name.startswith("SWP"):
-            annot.field_name = "SWP" + str(swp_index) # type: ignore
-            annot.update()
+def add_swp_pages_to_doc(
+    doc: fitz.Document, num_required_pages, field_index: FieldIndex | None = None
+):
+    field_index = field_index or FieldIndex(doc)
+    last_swp_page_index, last_swp_index = find_last_swp_page(doc, field_index)
+    required_pages = num_required_pages - last_swp_index
+    if required_pages <= 0:
+        return
 
+    # Copy the last SWP page once for every page needed, then rename the SWP fields on the
+    # copies in a single pass, indexing their widgets as they are renamed
+    first_new_page = last_swp_page_index + 1
+    for i in range(required_pages):
+        doc.fullcopy_page(last_swp_page_index, first_new_page + i)
+    field_index.insert_pages(first_new_page, required_pages)
 
-def add_swp_pages(file, num_required_pages, output_pdf):
-    doc = fitz.open(file)
-    last_swp_page_index, last_swp_index = find_last_swp_page(doc)
-    required_pages = num_required_pages - last_swp_index
     for i in range(required_pages):
-        add_swp_page(doc, last_swp_page_index + i + 1, last_swp_index + i + 1)
-    doc.save(output_pdf)
-    doc.close()
+        page_number = first_new_page + i
+        new_page: fitz.Page = doc[page_number]
+        for position, widget in enumerate(new_page.widgets()):
+            if widget.field_name and widget.field_name.startswith("SWP"):
+                widget.field_name = "SWP" + str(last_swp_index + i + 1) # type: ignore
+                widget.update()
+            field_index.add_widget(page_number, position, widget)
+
+
+# Opens the template with the SWP pages added, reusing a cached copy when there is one
+def open_expanded_template(template_pdf, num_required_pages) -> tuple[fitz.Document, FieldIndex]:
+    key = cache_key(*file_identity(template_pdf), num_required_pages)
+    cached = expanded_template_cache.get(key)
+    if cached is not None:
+        doc = fitz.open(stream=cached, filetype="pdf")
+        return doc, FieldIndex(doc)
+
+    doc = fitz.open(template_pdf)
+    field_index = FieldIndex(doc)
+    add_swp_pages_to_doc(doc, num_required_pages, field_index)
+    if config.cache.enabled:
+        expanded_template_cache.put(key, doc.tobytes())
+    return doc, field_index
+
+
+# Adds the SWP pages and fills the fields on one open document, then writes the output once
+def assemble_pdf(template_pdf, num_required_pages, output_pdf, data):
+    doc, field_index = open_expanded_template(template_pdf, num_required_pages)
+    try:
+        write_form_fields(doc, data, field_index)
+        doc.save(output_pdf, deflate=True)
+    finally:
+        doc.close()
+
+
+# Returns a procedure's pages rendered to PDF, rendering them only if they aren't cached
+def get_procedure_fragment(file_path, layout: FieldLayout) -> bytes:
+    key = cache_key(*file_identity(file_path), *layout)
+    fragment = procedure_fragment_cache.get(key)
+    if fragment is None:
+        fragment = render_text_pages(get_data_from_word_path(file_path, layout), layout)
+        procedure_fragment_cache.put(key, fragment)
+    return fragment
+
+
+# Like assemble_pdf, but draws pre-rendered procedure pages in place of the SWP text fields
+def assemble_pdf_with_fragments(template_pdf, work_procedure_paths, layout, output_pdf, data):
+    fragments = {}
+    fragment_pages = []
+    for file_path in work_procedure_paths:
+        # Open each procedure once so a repeated procedure reuses the same page objects
+        if file_path not in fragments:
+            fragments[file_path] = fitz.open(
+                stream=get_procedure_fragment(file_path, layout), filetype="pdf"
+            )
+        fragment = fragments[file_path]
+        fragment_pages.extend((fragment, pno) for pno in range(fragment.page_count))
+
+    doc, field_index = open_expanded_template(template_pdf, len(fragment_pages))
+    try:
+        write_form_fields(doc, data, field_index)
+        for n, (fragment, pno) in enumerate(fragment_pages):
+            field_name = get_work_procedure_text_field_name(n + 1)
+            for page, widget in field_index.page_widgets(field_name):
+                show_fragment_page(page, widget, fragment, pno)
+        doc.save(output_pdf, deflate=True)
+    finally:
+        doc.close()
+        for fragment in fragments.values():
+            fragment.close()
 
 
-def get_select_field_values(doc, field_name) -> list[str]:
+def get_select_field_values(
+    doc, field_name, field_index: FieldIndex | None = None
+) -> list[str]:
+    field_index = field_index or FieldIndex(doc)
     values = []
-    for page in doc:
-        for annot in page.widgets():
-            if annot.field_name == field_name:
-                if hasattr(annot, "choice_values"):
-                    values = annot.choice_values
-                    break
+    widgets = field_index.widgets(field_name)
+    if widgets and hasattr(widgets[-1], "choice_values"):
+        values = widgets[-1].choice_values or []
     return values
 
 
-def update_select_field(doc, field_name, options):
-    field_updated = False
-    for page in doc:
-        for annot in page.widgets():
-            if annot.field_name == field_name:
-                annot.choice_values = options
-                annot.update()
-                field_updated = True
-                break
-        if field_updated:
-            break
-
-    if not field_updated:
+def update_select_field(doc, field_name, options, field_index: FieldIndex | None = None):
+    field_index = field_index or FieldIndex(doc)
+    widgets = field_index.widgets(field_name)
+    if widgets:
+        widgets[0].choice_values = options
+        widgets[0].update()
+    else:
         print(f"Warning: No field found with the name {field_name}.")
 
 
+def get_work_procedure_text_field_name(index) -> str:
+    if index == 1:
+        return work_procedure_text_field.replace("X", "")
+    return work_procedure_text_field.replace("X", str(index))
+
+
 def add_work_procedure_text(extracted_data, work_procedure_texts):
     for n in range(len(work_procedure_texts)):
-        index = n + 1
-        if index == 1:
-            text_field_name = work_procedure_text_field.replace("X", "")
-        else:
-            text_field_name = work_procedure_text_field.replace("X", str(index))
+        text_field_name = get_work_procedure_text_field_name(n + 1)
         extracted_data[text_field_name] = work_procedure_texts[n]
 
     return extracted_data
 
 
-def get_safe_work_procedues(source_pdf, extracted_data, work_procedure_folder):
-    work_procedure_texts = []
+# Returns the selected work procedure file names, in slot order
+def get_work_procedure_names(source_pdf, extracted_data) -> list[str]:
+    lookup_file_names = []
     for n in range(1, num_work_procedure_fields + 1):
         swp_field = work_procedure_select_field.replace("X", str(n))
         lookup_file_name = get_dropdown_value(source_pdf, extracted_data, swp_field, False)
@@ -196,33 +303,82 @@ def get_safe_work_procedues(source_pdf, extracted_data, work_procedure_folder):
             lookup_file_name = get_dropdown_value(source_pdf, extracted_data, swp_field, True)
 
         if lookup_file_name and lookup_file_name != "UNUSED":
-            work_procedure_texts = work_procedure_texts + get_data_from_word_file(
-                lookup_file_name, work_procedure_folder
-            )
+            lookup_file_names.append(lookup_file_name)
+
+    return lookup_file_names
+
+
+# Returns the paths of the selected work procedure documents, in slot order
+def get_work_procedure_paths(source_pdf, extracted_data, work_procedure_folder) -> list[str]:
+    lookup_file_names = get_work_procedure_names(source_pdf, extracted_data)
+
+    # Resolve every selected procedure at once so all missing or duplicate names are reported
+    file_paths = load_folder_index(work_procedure_folder).find_all(
+        [f"{name}.docx" for name in lookup_file_names]
+    )
+
+    return [file_paths[f"{name}.docx"] for name in lookup_file_names]
+
+
+def get_safe_work_procedues(source_pdf, extracted_data, work_procedure_folder):
+    work_procedure_paths = get_work_procedure_paths(
+        source_pdf, extracted_data, work_procedure_folder
+    )
+    return get_work_procedure_texts(work_procedure_paths)
+
+
+def get_work_procedure_texts(work_procedure_paths, layout: FieldLayout | None = None) -> list[str]:
+    work_procedure_texts = []
+    for file_path in work_procedure_paths:
+        work_procedure_texts = work_procedure_texts + get_data_from_word_path(file_path, layout)
 
     return work_procedure_texts
 
 
+# Returns a hash of everything the generated SWP depends on
+def get_generation_key(extracted_data, template_pdf, work_procedure_paths) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps(extracted_data, sort_keys=True, default=str).encode("utf-8"))
+
+    with open(template_pdf, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    for file_path in work_procedure_paths:
+        digest.update(str(file_identity(file_path)).encode("utf-8"))
+
+    # Settings that change how the output is built, leaving out ones like the worker count
+    # that only change how fast it is built
+    digest.update(
+        config.generation.model_dump_json(
+            include={"layout_pagination", "prerendered_procedures"}
+        ).encode("utf-8")
+    )
+    digest.update(config.field_names.model_dump_json().encode("utf-8"))
+
+    return digest.hexdigest()
+
+
 def get_files_from_folder(folder, file_extension):
     files_list = []
 
-    for dirpath, dirnames, filenames in os.walk(folder):
-        for filename in filenames:
-            if filename.endswith(file_extension):
-                try:
-                    file_name_without_extension = (
-                        os.path.splitext(filename)[0].encode("utf-8").decode("utf-8")
-                    )
-                    files_list.append(file_name_without_extension)
-                except (UnicodeEncodeError, UnicodeDecodeError):
-                    print(
-                        f"Bad file name: {filename.encode('utf-8', 'ignore').decode('utf-8')}. Please change the filename to use only normal characters."
-                    )
+    for filename in load_folder_index(folder).names_with_extension(file_extension):
+        try:
+            file_name_without_extension = (
+                os.path.splitext(filename)[0].encode("utf-8").decode("utf-8")
+            )
+            files_list.append(file_name_without_extension)
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            print(
+                f"Bad file name: {filename.encode('utf-8', 'ignore').decode('utf-8')}. Please change the filename to use only normal characters."
+            )
 
     return files_list
 
 
-def generate_pdf(source_pdf, template_folder, work_procedure_folder):
+def generate_pdf(
+    source_pdf, template_folder, work_procedure_folder, print_data=True, force=False
+):
     # Extract the data from the source pdf
     extracted_data = extract_fillable_data(source_pdf)
 
@@ -230,51 +386,159 @@ def generate_pdf(source_pdf, template_folder, work_procedure_folder):
     template_file_name = get_dropdown_value(source_pdf, extracted_data, template_select_field)
     template_pdf = get_pdf_file(template_file_name, template_folder)
 
-    # Get the work procedure text from the lookup word file
-    work_procedure_texts = get_safe_work_procedues(
+    work_procedure_paths = get_work_procedure_paths(
         source_pdf, extracted_data, work_procedure_folder
     )
-    extracted_data = add_work_procedure_text(extracted_data, work_procedure_texts)
 
-    # Create a temporary pdf with the extra SWP pages
-    temp_pdf_path = os.path.join(
-        os.path.dirname(source_pdf), f"{os.path.splitext(source_pdf)[0]}_TEMP_DELETE.pdf"
+    new_pdf_path = os.path.join(
+        os.path.dirname(source_pdf), f"{os.path.splitext(source_pdf)[0]}_SWP.pdf"
     )
 
-    add_swp_pages(template_pdf, len(work_procedure_texts), temp_pdf_path)
+    # Skip the work if an SWP was already generated from exactly the same inputs
+    ledger = None
+    generation_key = None
+    if config.generation.skip_unchanged:
+        ledger = GenerationLedger(os.path.dirname(os.path.abspath(new_pdf_path)))
+        generation_key = get_generation_key(extracted_data, template_pdf, work_procedure_paths)
+        existing_pdf = None if force else ledger.find(new_pdf_path, generation_key)
+        if existing_pdf:
+            if os.path.abspath(existing_pdf) == os.path.abspath(new_pdf_path):
+                print(f"Unchanged, skipped: {new_pdf_path}")
+            else:
+                shutil.copyfile(existing_pdf, new_pdf_path)
+                ledger.record(new_pdf_path, generation_key)
+                print(f"Unchanged, copied {existing_pdf} to {new_pdf_path}")
+            ledger.close()
+            return new_pdf_path
+
+    # Get the work procedure text from the lookup word file
+    layout = get_swp_field_layout(template_pdf)
+    use_fragments = bool(layout and config.generation.prerendered_procedures)
+    work_procedure_texts = []
+    if not use_fragments:
+        # Pre-rendered procedures come from their fragments, so only read them for the fields
+        work_procedure_texts = get_work_procedure_texts(work_procedure_paths, layout)
+        extracted_data = add_work_procedure_text(extracted_data, work_procedure_texts)
 
     # Print the data in a nice way
-    print("\n----------------------- Data -----------------------")
-    print(
-        "{"
-        + ",\n".join(
-            "{!r}: {!r}".format(
-                k, v.encode("utf-8", "ignore").decode("utf-8") if v is not None else None
+    if print_data:
+        print("\n----------------------- Data -----------------------")
+        print(
+            "{"
+            + ",\n".join(
+                "{!r}: {!r}".format(
+                    k, v.encode("utf-8", "ignore").decode("utf-8") if v is not None else None
+                )
+                for k, v in extracted_data.items()
             )
-            for k, v in extracted_data.items()
+            + "}"
         )
-        + "}"
-    )
 
     # Create a new pdf from the template and fill it with the combined data
-    new_pdf_path = os.path.join(
-        os.path.dirname(source_pdf), f"{os.path.splitext(source_pdf)[0]}_SWP.pdf"
-    )
     print(f"Created new pdf: {new_pdf_path}")
 
-    try:
-        fillpdfs.write_fillable_pdf(temp_pdf_path, new_pdf_path, extracted_data)
-    finally:
-        # delete the temporary pdf
-        os.remove(temp_pdf_path)
+    if use_fragments:
+        assemble_pdf_with_fragments(
+            template_pdf, work_procedure_paths, layout, new_pdf_path, extracted_data
+        )
+    else:
+        assemble_pdf(template_pdf, len(work_procedure_texts), new_pdf_path, extracted_data)
+
+    if ledger:
+        ledger.record(new_pdf_path, generation_key)
+        ledger.close()
+
+    return new_pdf_path
+
+
+# Returns the source PDFs in a folder, or matching a glob pattern, skipping generated PDFs
+def get_source_pdfs(source) -> list[str]:
+    if os.path.isdir(source):
+        source = os.path.join(glob.escape(source), "*.pdf")
+
+    generated_suffixes = ("_SWP.pdf", "_UPDATED.pdf", "_TEMP_DELETE.pdf")
+    return sorted(
+        path
+        for path in glob.glob(source)
+        if path.lower().endswith(".pdf") and not path.endswith(generated_suffixes)
+    )
 
 
-def update_master(source_pdf, template_folder, work_procedure_folder):
+def generate_pdfs(source, template_folder, work_procedure_folder, workers=None, force=False):
+    source_pdfs = get_source_pdfs(source)
+    if not source_pdfs:
+        print(f"No source PDFs found in {source}")
+        return {}
+
+    workers = workers or config.generation.batch_workers or None
+    print(f"Generating {len(source_pdfs)} SWPs...")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                generate_pdf, source_pdf, template_folder, work_procedure_folder, False, force
+            ): source_pdf
+            for source_pdf in source_pdfs
+        }
+        for future in as_completed(futures):
+            source_pdf = futures[future]
+            try:
+                future.result()
+                results[source_pdf] = None
+                print(f"Done: {source_pdf}")
+            except Exception as e:
+                results[source_pdf] = str(e)
+                print(f"Failed: {source_pdf}: {e}")
+
+    # Print a summary of every file
+    failed = {path: error for path, error in results.items() if error}
+    print("\n----------------------- Summary -----------------------")
+    for source_pdf in source_pdfs:
+        error = results[source_pdf]
+        print(f"{'FAILED' if error else 'OK'}: {os.path.basename(source_pdf)}")
+        if error:
+            print(f"    {error}")
+    print(f"{len(source_pdfs) - len(failed)} succeeded, {len(failed)} failed")
+
+    return results
+
+
+# Saves the master pdf, appending only the changed objects when the output is the open file
+def save_master(doc: fitz.Document, output_pdf, incremental):
+    doc_name = doc.name or ""
+    same_file = os.path.abspath(doc_name) == os.path.abspath(output_pdf)
+
+    if same_file and incremental and doc.can_save_incrementally():
+        doc.save(doc_name, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)  # type: ignore
+        doc.close()
+    elif same_file:
+        # A full save can't overwrite the open file, so save beside it and swap it in
+        temp_fd, temp_pdf_path = tempfile.mkstemp(
+            suffix="_TEMP_DELETE.pdf", dir=os.path.dirname(os.path.abspath(output_pdf))
+        )
+        os.close(temp_fd)
+        try:
+            doc.save(temp_pdf_path)
+            doc.close()
+            os.replace(temp_pdf_path, output_pdf)
+        finally:
+            if os.path.exists(temp_pdf_path):
+                os.remove(temp_pdf_path)
+    else:
+        doc.save(output_pdf)
+        doc.close()
+
+
+def update_master(source_pdf, template_folder, work_procedure_folder, in_place=False):
     doc = fitz.open(source_pdf)
+    field_index = FieldIndex(doc)
 
     # Get the existing templates and work procedures
-    existing_templates = get_select_field_values(doc, template_select_field)
-    existing_work_procedures = get_select_field_values(doc, work_procedure_select_all_field)
+    existing_templates = get_select_field_values(doc, template_select_field, field_index)
+    existing_work_procedures = get_select_field_values(
+        doc, work_procedure_select_all_field, field_index
+    )
 
     # Get the new templates and work procedures
     templates = get_files_from_folder(template_folder, ".pdf")
@@ -292,16 +556,44 @@ def update_master(source_pdf, template_folder, work_procedure_folder):
     print("Work procedures added:", new_work_procedures)
     print("Work procedures removed:", removed_work_procedures)
 
-    # Update the template select field
-    update_select_field(doc, template_select_field, templates)
+    if not (new_templates or removed_templates or new_work_procedures or removed_work_procedures):
+        doc.close()
+        print("The master pdf is already up to date.")
+        return
 
-    # Update the work procedure select field
-    update_select_field(doc, work_procedure_select_all_field, work_procedures)
+    if in_place:
+        new_pdf_path = source_pdf
+    else:
+        new_pdf_path = os.path.join(
+            os.path.dirname(source_pdf), f"{os.path.splitext(source_pdf)[0]}_UPDATED.pdf"
+        )
 
-    new_pdf_path = os.path.join(
-        os.path.dirname(source_pdf), f"{os.path.splitext(source_pdf)[0]}_UPDATED.pdf"
-    )
-    doc.save(new_pdf_path)
-    doc.close()
+    incremental = config.update_master.incremental_save
+    copied = incremental and not in_place
+    if copied:
+        # Copy the master and append the changed fields to the copy
+        doc.close()
+        shutil.copyfile(source_pdf, new_pdf_path)
+        doc = fitz.open(new_pdf_path)
+        field_index = FieldIndex(doc)
 
-    print(f"Created new pdf: {new_pdf_path}")
\ No newline at end of file
+    try:
+        # Update the template select field
+        update_select_field(doc, template_select_field, templates, field_index)
+
+        # Update the work procedure select field
+        update_select_field(doc, work_procedure_select_all_field, work_procedures, field_index)
+
+        save_master(doc, new_pdf_path, incremental)
+    except Exception:
+        # Don't leave a half updated copy of the master behind
+        if not doc.is_closed:
+            doc.close()
+        if copied and os.path.exists(new_pdf_path):
+            os.remove(new_pdf_path)
+        raise
+
+    if in_place:
+        print(f"Updated pdf: {new_pdf_path}")
+    else:
+        print(f"Created new pdf: {new_pdf_path}")
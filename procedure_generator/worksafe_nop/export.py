@@ -0,0 +1,160 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import csv
+import glob
+import importlib.util
+import json
+import os
+import tempfile
+from ..cache import DiskCache, cache_key, file_identity
+from ..config_loader import config
+from .pdf_to_data import extract_fillable_data_with_risk
+
+
+EXPORT_VERSION = 1
+EXPORT_FORMATS = {".jsonl": "jsonl", ".csv": "csv", ".parquet": "parquet"}
+
+# Data already read from each SWP, keyed by file identity and the risk terms
+swp_export_cache = DiskCache("swp_export", max_entries=config.cache.swp_export_max_entries)
+
+
+def get_swp_pdfs(source) -> list[str]:
+    """Return the generated SWPs below a folder, or the PDFs matching a glob pattern"""
+    if os.path.isdir(source):
+        source = os.path.join(glob.escape(source), "**", "*_SWP.pdf")
+    return sorted(
+        path for path in glob.glob(source, recursive=True) if path.lower().endswith(".pdf")
+    )
+
+
+def _export_key(pdf_path) -> str:
+    return cache_key(EXPORT_VERSION, *file_identity(pdf_path), json.dumps(config.nop.risk_terms))
+
+
+def _read_swp(pdf_path) -> tuple[dict | None, str | None]:
+    # Runs in a worker process, which already is one of many, so scan the risk terms in process
+    try:
+        return extract_fillable_data_with_risk(pdf_path, parallel_risk_scan=False), None
+    except Exception as e:
+        return None, str(e)
+
+
+def iter_swp_records(pdf_paths, workers=None):
+    """
+    Yield (pdf_path, fields, error) for each SWP, in the order given.
+
+    Cached SWPs are yielded without being read, the rest are read across a process pool.
+    """
+    keys = {}
+    cached = {}
+    for pdf_path in pdf_paths:
+        try:
+            keys[pdf_path] = _export_key(pdf_path)
+        except OSError as e:
+            cached[pdf_path] = (None, str(e))
+            continue
+        fields = swp_export_cache.get_json(keys[pdf_path])
+        if fields is not None:
+            cached[pdf_path] = (fields, None)
+
+    workers = workers or config.nop.export.workers or None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            pdf_path: executor.submit(_read_swp, pdf_path)
+            for pdf_path in pdf_paths
+            if pdf_path not in cached
+        }
+        for pdf_path in pdf_paths:
+            if pdf_path in cached:
+                fields, error = cached[pdf_path]
+            else:
+                fields, error = futures[pdf_path].result()
+                if fields is not None:
+                    swp_export_cache.put_json(keys[pdf_path], fields)
+            yield pdf_path, fields, error
+
+
+def _write_csv(jsonl_path, output_path):
+    # Every column has to be known before the header is written, so read the records twice
+    columns = {}
+    with open(jsonl_path, encoding="utf-8") as jsonl_file:
+        for line in jsonl_file:
+            columns.update(dict.fromkeys(json.loads(line)))
+
+    with open(jsonl_path, encoding="utf-8") as jsonl_file, open(
+        output_path, "w", encoding="utf-8-sig", newline=""
+    ) as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(columns))
+        writer.writeheader()
+        for line in jsonl_file:
+            writer.writerow(json.loads(line))
+
+
+def _write_parquet(jsonl_path, output_path):
+    import pandas as pd
+
+    with open(jsonl_path, encoding="utf-8") as jsonl_file:
+        records = [json.loads(line) for line in jsonl_file]
+    pd.DataFrame.from_records(records).to_parquet(output_path, index=False)
+
+
+def export_swp_data(source, output_path, workers=None) -> dict:
+    """
+    Export the form data and risk level of every SWP to a JSONL, CSV or Parquet file.
+
+    The format comes from the output file extension. Records are streamed to JSONL as they
+    are read; CSV and Parquet are written from that stream once every SWP has been read.
+    """
+    export_format = EXPORT_FORMATS.get(os.path.splitext(output_path)[1].lower())
+    if export_format is None:
+        raise Exception(
+            f"Unsupported export file {output_path}, use one of {', '.join(EXPORT_FORMATS)}"
+        )
+    # Fail before reading every SWP rather than when the file is written
+    if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise Exception("Exporting to Parquet needs pyarrow installed")
+
+    pdf_paths = get_swp_pdfs(source)
+    if not pdf_paths:
+        print(f"No SWP PDFs found in {source}")
+        return {}
+
+    print(f"Exporting {len(pdf_paths)} SWPs...")
+
+    if export_format == "jsonl":
+        jsonl_path = output_path
+    else:
+        temp_fd, jsonl_path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(temp_fd)
+
+    errors = {}
+    try:
+        with open(jsonl_path, "w", encoding="utf-8") as jsonl_file:
+            for pdf_path, fields, error in iter_swp_records(pdf_paths, workers):
+                if fields is None:
+                    errors[pdf_path] = error
+                    print(f"Failed: {pdf_path}: {error}")
+                    continue
+                jsonl_file.write(json.dumps({"FILE": pdf_path, **fields}) + "\n")
+
+        if export_format == "csv":
+            _write_csv(jsonl_path, output_path)
+        elif export_format == "parquet":
+            _write_parquet(jsonl_path, output_path)
+    finally:
+        if jsonl_path != output_path and os.path.exists(jsonl_path):
+            os.remove(jsonl_path)
+
+    print(f"Exported {len(pdf_paths) - len(errors)} SWPs to {output_path}, {len(errors)} failed")
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the data of many SWP PDFs")
+    parser.add_argument("source", help="Folder of SWP PDFs, or a glob pattern")
+    parser.add_argument("output_path", help="Output .jsonl, .csv or .parquet file")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+
+    args = parser.parse_args()
+
+    export_swp_data(args.source, args.output_path, args.workers)
@@ -0,0 +1,139 @@
+from playwright.sync_api import Page
+from ..cache import DiskCache, cache_key
+
+
+# Selectors that found each field in earlier sessions, keyed by page, field id and type
+learned_selector_cache = DiskCache("nop_selectors", max_entries=1000)
+
+# Finds the element a selector strategy points to. label:has-text is Playwright only, so it
+# is matched here like Playwright does: label text containing the field id, ignoring case
+# and extra whitespace.
+FIND_ELEMENT_SCRIPT = """strategy => {
+    const normalize = text => (text || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    if (strategy.css) {
+        try {
+            return document.querySelector(strategy.css);
+        } catch (e) {
+            // An id that isn't valid CSS can't match
+            return null;
+        }
+    }
+    const text = normalize(strategy.label);
+    for (const label of document.querySelectorAll('label')) {
+        if (!normalize(label.textContent).includes(text)) continue;
+        let sibling = label.nextElementSibling;
+        for (; sibling; sibling = sibling.nextElementSibling) {
+            if (sibling.matches(strategy.sibling)) return sibling;
+        }
+    }
+    return null;
+}"""
+
+# Runs every field's selector strategies in the page and returns the first one that matches
+# each field, so a whole page is resolved in one round trip
+RESOLVE_SELECTORS_SCRIPT = """fields => {
+    const findElement = %s;
+
+    const found = {};
+    for (const field of fields) {
+        const strategy = field.strategies.find(strategy => findElement(strategy) !== null);
+        found[field.id] = strategy ? strategy.selector : null;
+    }
+    return found;
+}""" % FIND_ELEMENT_SCRIPT
+
+
+def get_selector_strategies(field_id: str, field_type: str) -> list[dict]:
+    """
+    Return the selectors tried for a field, in order.
+
+    Each strategy has the Playwright selector used to fill the field, and either the CSS
+    or the label text and sibling element used to look for it in the page.
+    """
+    css_selectors = [
+        f"#{field_id}",  # By ID
+        f"[name={field_id}]",  # By name
+        f"[ng-model='{field_id}']",  # Angular ng-model
+        f"[formcontrolname='{field_id}']",  # Angular reactive forms
+        f"[id*='{field_id}']",  # ID contains
+    ]
+    strategies = [{"selector": css, "css": css} for css in css_selectors]
+
+    # Label + adjacent input
+    strategies.append({
+        "selector": f"label:has-text('{field_id}') + input, label:has-text('{field_id}') ~ input",
+        "label": field_id,
+        "sibling": "input",
+    })
+
+    # Placeholder
+    placeholder = f"[placeholder='{field_id}']"
+    strategies.append({"selector": placeholder, "css": placeholder})
+
+    # Add specific selector for select elements
+    if field_type == "select":
+        strategies.append({
+            "selector": f"label:has-text('{field_id}') ~ select",
+            "label": field_id,
+            "sibling": "select",
+        })
+
+    return strategies
+
+
+def get_selector_strategy(field_id: str, field_type: str, selector: str) -> dict | None:
+    """Return the strategy a resolved selector came from"""
+    for strategy in get_selector_strategies(field_id, field_type):
+        if strategy["selector"] == selector:
+            return strategy
+    return None
+
+
+def _learned_selector_key(page_name, field_id, field_type) -> str:
+    return cache_key(page_name, field_id, field_type)
+
+
+def learn_selector(page_name, field_id: str, field_type: str, selector: str):
+    """Remember the selector that filled a field, to try it first next session"""
+    key = _learned_selector_key(page_name, field_id, field_type)
+    if learned_selector_cache.get_json(key) != selector:
+        learned_selector_cache.put_json(key, selector)
+
+
+def forget_selector(page_name, field_id: str, field_type: str):
+    """Forget the selector learned for a field, after it failed to fill the field"""
+    learned_selector_cache.delete(_learned_selector_key(page_name, field_id, field_type))
+
+
+def resolve_selectors(page: Page, fields: dict[str, str], page_name=None) -> dict[str, str | None]:
+    """
+    Find the selector for every field id, mapped to its field type, in one evaluate call.
+
+    With a page name, the selector learned for a field in an earlier session is tried
+    before the others, and forgotten if it no longer finds the field.
+    """
+    if not fields:
+        return {}
+
+    learned = {}
+    payload = []
+    for field_id, field_type in fields.items():
+        strategies = get_selector_strategies(field_id, field_type)
+        if page_name:
+            key = _learned_selector_key(page_name, field_id, field_type)
+            selector = learned_selector_cache.get_json(key)
+            strategy = get_selector_strategy(field_id, field_type, selector) if selector else None
+            if strategy:
+                learned[field_id] = (key, selector)
+                strategies.remove(strategy)
+                strategies.insert(0, strategy)
+        payload.append({"id": field_id, "strategies": strategies})
+
+    found = page.evaluate(RESOLVE_SELECTORS_SCRIPT, payload)
+
+    for field_id, (key, selector) in learned.items():
+        if found.get(field_id) != selector:
+            print(f"Learned selector {selector} no longer finds {field_id}, searching again")
+            learned_selector_cache.delete(key)
+
+    return found
@@ -1,19 +1,22 @@
 import json
-import time
 import sys
 import argparse
-import json
 from playwright.sync_api import sync_playwright, Page
 
 from .handlers import (
     handle_address,
+    handle_bulk_fill,
     handle_checkbox,
     handle_dropdown,
     handle_radio_button,
 )
 from ..config_loader import config
+from .field_selectors import forget_selector, learn_selector, resolve_selectors
 from .pdf_to_data import extract_fillable_data_with_risk
 
+# Field types whose value can be set directly, without their own handler
+BULK_FILL_TYPES = {"text", "number", "email", "textarea", "date"}
+
 
 def load_json_file(filename):
     """Load JSON data from a file."""
@@ -70,7 +73,8 @@ def fill_form(page: Page, page_name: str, mappings, data):
     # Get transformations from mappings
     transformations = mappings.transformations
 
-    # Fill each field based on the mapping
+    # Work out the value of each field based on the mapping
+    fields = []
     for field_id, field_config in page_mapping.items():
         data_key = field_config["data_key"]
         field_type = field_config["type"]
@@ -81,48 +85,60 @@ def fill_form(page: Page, page_name: str, mappings, data):
             transformed_value = apply_transformations(data_key, value, transformations, data)
             
             if transformed_value:
-                fill_element(page, field_id, transformed_value, data_key, field_type)
-                # Small pause between field interactions
-                page.wait_for_timeout(config.timeouts.field_interaction_delay)
+                fields.append((field_id, transformed_value, data_key, field_type))
+
+    # Find every field's selector in one call to the browser, trying learned selectors first
+    selectors = resolve_selectors(
+        page, {field_id: field_type for field_id, _, _, field_type in fields}, page_name
+    )
+
+    if mappings.bulk_fill:
+        # Set the plain value fields together, the rest keep their own handlers
+        filled = handle_bulk_fill(page, [
+            (field_id, field_type, selectors[field_id], value)
+            for field_id, value, _, field_type in fields
+            if field_type in BULK_FILL_TYPES and selectors.get(field_id)
+        ])
+        for field_id, value, _, field_type in fields:
+            selector = selectors.get(field_id)
+            if field_id in filled and selector:
+                print(f"Filled {field_id} with {value} using selector: {selector}")
+                learn_selector(page_name, field_id, field_type, selector)
+        fields = [field for field in fields if field[0] not in filled]
+
+    for field_id, value, data_key, field_type in fields:
+        used_selector = fill_element(
+            page, field_id, value, data_key, field_type, selectors.get(field_id)
+        )
+        if used_selector:
+            learn_selector(page_name, field_id, field_type, used_selector)
+        else:
+            forget_selector(page_name, field_id, field_type)
+        # Small pause between field interactions
+        page.wait_for_timeout(config.timeouts.field_interaction_delay)
 
 
-def fill_element(page: Page, field_id: str, value: str, data_key: str, field_type: str):
-    """Fill a form element using the appropriate method based on field type."""
+def fill_element(
+    page: Page, field_id: str, value: str, data_key: str, field_type: str, used_selector=None
+):
+    """
+    Fill a form element using the appropriate method based on field type.
+
+    Returns the selector the field was filled with, or None if it couldn't be filled or its
+    handler couldn't set the value.
+    """
     try:
-        # Try to find the element using various selectors
-        selectors = [
-            f"#{field_id}",  # By ID
-            f"[name={field_id}]",  # By name
-            f"[ng-model='{field_id}']",  # Angular ng-model
-            f"[formcontrolname='{field_id}']",  # Angular reactive forms
-            f"[id*='{field_id}']",  # ID contains
-            f"label:has-text('{field_id}') + input, label:has-text('{field_id}') ~ input",  # Label + adjacent input
-            f"[placeholder='{field_id}']",  # Placeholder
-        ]
-
-        # Add specific selector for select elements
-        if field_type == "select":
-            selectors.append(f"label:has-text('{field_id}') ~ select")
-
-        # Try each selector
-        element_handle = None
-        used_selector = None
-
-        for selector in selectors:
-            if page.locator(selector).count() > 0:
-                element_handle = page.locator(selector).first
-                used_selector = selector
-                break
+        # Fields the page only shows after earlier fields were filled weren't there when the
+        # page's selectors were resolved, so look for them again
+        if not used_selector:
+            used_selector = resolve_selectors(page, {field_id: field_type}).get(field_id)
 
-        if not element_handle:
-            print(f"Could not find field: {field_id} for {data_key}")
-            return
-        
         if not used_selector:
-            print(f"No valid selector found for field: {field_id} with data key: {data_key}")
+            print(f"Could not find field: {field_id} for {data_key}")
             return
 
-        # Handle based on field type
+        # Handle based on field type, handlers that can fail to set the value say so
+        filled = True
         if field_type == "text" or field_type == "number" or field_type == "email":
             page.fill(used_selector, value)
 
@@ -133,7 +149,7 @@ def fill_element(page: Page, field_id: str, value: str, data_key: str, field_typ
             page.fill(used_selector, value)
 
         elif field_type == "select":
-            handle_dropdown(page, used_selector, value)
+            filled = handle_dropdown(page, used_selector, value)
 
         elif field_type == "date":
             page.fill(used_selector, value)
@@ -141,95 +157,133 @@ def fill_element(page: Page, field_id: str, value: str, data_key: str, field_typ
             page.evaluate(f'document.querySelector("{used_selector}").value = "{value}"')
 
         elif field_type == "radio":
-            handle_radio_button(page, used_selector, value)
+            filled = handle_radio_button(page, used_selector, value)
 
         elif field_type == "checkbox":
-            handle_checkbox(page, used_selector, value)
+            filled = handle_checkbox(page, used_selector, value)
 
         else:
             # Default to fill
             page.fill(used_selector, value)
 
+        if not filled:
+            print(f"Could not fill {field_id} with {value} using selector: {used_selector}")
+            return None
+
         print(f"Filled {field_id} with {value} using selector: {used_selector}")
+        return used_selector
 
     except Exception as e:
         print(f"Error filling {field_id}: {e}")
+        return None
+
+
+# Returns the page's title, from its heading, breadcrumb, legend or document title
+PAGE_TITLE_SCRIPT = """() => {
+    // Try different ways to find the page title/heading
+    const h1 = document.querySelector('h1, .page-title, .title');
+    if (h1) return h1.innerText;
+    // Look for breadcrumb
+    const breadcrumb = document.querySelector('.breadcrumb li:last-child');
+    if (breadcrumb) return breadcrumb.innerText;
+
+    // Look for form legend or fieldset title
+    const legend = document.querySelector('legend, fieldset > h2');
+    if (legend) return legend.innerText;
+
+    return document.title;
+}"""
+
+# Reports each new view to Python through the _nopViewChanged binding. DOM changes are
+# debounced, so the check only runs once Angular has finished rendering, and a view is only
+# reported when its path or title differs from the last one reported.
+NAVIGATION_SCRIPT = """debounceMs => {
+    // Init scripts also run in frames, only the top page is tracked
+    if (window !== window.top || window._nopNavigationInstalled) return;
+    window._nopNavigationInstalled = true;
+
+    const pageTitle = %s;
+    let lastView = null;
+    let timer = null;
+    let waitingSince = 0;
+
+    const report = () => {
+        timer = null;
+        const title = pageTitle() || '';
+        const view = location.pathname + '\\n' + title;
+        if (view !== lastView && window._nopViewChanged) {
+            lastView = view;
+            window._nopViewChanged(location.pathname, title);
+        }
+    };
+    const schedule = () => {
+        // A page that never stops changing is still checked every few debounce periods
+        if (timer === null) {
+            waitingSince = Date.now();
+        } else if (Date.now() - waitingSince > debounceMs * 4) {
+            return;
+        }
+        clearTimeout(timer);
+        timer = setTimeout(report, debounceMs);
+    };
+
+    for (const method of ['pushState', 'replaceState']) {
+        const original = history[method];
+        history[method] = function() {
+            const result = original.apply(this, arguments);
+            schedule();
+            return result;
+        };
+    }
+    window.addEventListener('popstate', schedule);
+    window.addEventListener('hashchange', schedule);
+
+    const start = () => {
+        new MutationObserver(schedule).observe(document.body, {childList: true, subtree: true});
+        schedule();
+    };
+    if (document.body) {
+        start();
+    } else {
+        document.addEventListener('DOMContentLoaded', start);
+    }
+}""" % PAGE_TITLE_SCRIPT
+
+
+def match_page_name(page_title, mappings):
+    """Return the mapped page whose name matches the page title"""
+    if page_title:
+        page_title = page_title.lower()
+        print(f"Detected page title: {page_title}")
+        for page_data in mappings.pages:
+            page_name = list(page_data.keys())[0]
+            if page_name.lower() in page_title or page_title in page_name.lower():
+                return page_name
+
+    return None
 
 
 def monitor_navigation(page: Page, current_page: str, mappings, data):
     """Monitor for Angular client-side navigation and fill forms as needed."""
-    # Install route change detector for Angular
-    page.evaluate("""() => {
-        // Monitor for Angular route changes using router events
-        window._prevPathname = location.pathname;
-        window._routeChanges = [];
-        
-        // Watch for DOM changes that might indicate navigation
-        const observer = new MutationObserver((mutations) => {
-            // Check if URL path has changed
-            if (location.pathname !== window._prevPathname) {
-                window._routeChanges.push(location.pathname);
-                window._prevPathname = location.pathname;
-            }
-            
-            // Check for Angular view container changes
-            const hasRouterOutlet = document.querySelector('router-outlet, [ng-view], .ng-view');
-            if (hasRouterOutlet) {
-                // If router outlet's next sibling changed, likely a view change
-                window._routeChanges.push('view-changed');
-            }
-        });
-        
-        // Observe the entire document for changes
-        observer.observe(document.body, {
-            childList: true,
-            subtree: true
-        });
-        
-        // Intercept history methods for SPA navigation
-        const originalPushState = history.pushState;
-        const originalReplaceState = history.replaceState;
-        
-        history.pushState = function() {
-            originalPushState.apply(this, arguments);
-            window._routeChanges.push(location.pathname);
-        };
-        
-        history.replaceState = function() {
-            originalReplaceState.apply(this, arguments);
-            window._routeChanges.push(location.pathname);
-        };
-    }""")
+    view_changes = []
+    closed = []
+
+    # The binding only queues the view, forms are filled from the loop below
+    page.expose_binding(
+        "_nopViewChanged", lambda source, path, title: view_changes.append((path, title))
+    )
+    page.on("close", lambda _: closed.append(True))
+
+    # Install the detector for later page loads and for the page that is already open
+    debounce = config.timeouts.navigation_debounce
+    page.add_init_script(f"({NAVIGATION_SCRIPT})({debounce})")
+    page.evaluate(NAVIGATION_SCRIPT, debounce)
 
     # Check for visible page indicators instead of URL
     def detect_current_page():
         """Try to determine which page we're currently on based on visible content"""
         try:
-            # Look for page-specific elements or content
-            page_title = page.evaluate("""() => {
-                // Try different ways to find the page title/heading
-                const h1 = document.querySelector('h1, .page-title, .title');
-                if (h1) return h1.innerText;                
-                // Look for breadcrumb
-                const breadcrumb = document.querySelector('.breadcrumb li:last-child');
-                if (breadcrumb) return breadcrumb.innerText;
-                
-                // Look for form legend or fieldset title
-                const legend = document.querySelector('legend, fieldset > h2');
-                if (legend) return legend.innerText;
-                
-                return document.title;
-            }""")
-
-            if page_title:
-                page_title = page_title.lower()
-                print(f"Detected page title: {page_title}")
-                for page_data in mappings.pages:
-                    page_name = list(page_data.keys())[0]
-                    if page_name.lower() in page_title or page_title in page_name.lower():
-                        return page_name
-
-            return None
+            return match_page_name(page.evaluate(PAGE_TITLE_SCRIPT), mappings)
         except Exception as e:
             print(f"Error detecting current page: {e}")
             return None
@@ -243,94 +297,19 @@ def monitor_navigation(page: Page, current_page: str, mappings, data):
         print(f"Using URL-based initial page: {current_page}")
         fill_form(page, current_page, mappings, data)
 
-    # Watch for "Next" button clicks
-    def watch_for_next_button():
-        try:
-            next_button = page.query_selector(
-                "button:has-text('Next'), input[value='Next'], .btn-primary:has-text('Next')"
-            )
-            if next_button and next_button.is_visible():
-                # print("Found Next button - setting up click monitor")
-
-                # Save current state before click
-                pre_click_content = page.evaluate("document.body.innerHTML.length")
-
-                # Set up detection for the page change after click
-                def check_after_click():
-                    page.wait_for_timeout(
-                        config.timeouts.navigation_timeout
-                    )  # Wait for Angular to update the view
-                    new_content_size = page.evaluate("document.body.innerHTML.length")
-
-                    # If content size changed significantly, likely a new page loaded
-                    if (
-                        abs(new_content_size - pre_click_content)
-                        > config.timeouts.content_change_threshold
-                    ):
-                        print("Content changed after button click - checking for new page")
-                        new_page = detect_current_page()
-                        if new_page:
-                            print(f"New page detected after navigation: {new_page}")
-                            fill_form(page, new_page, mappings, data)
-
-                # Install click event listener on the next button
-                next_button.evaluate(
-                    "el => el.addEventListener('click', () => window._clickedNext = true)"
-                )
-
-                # Return the checker function
-                return check_after_click
-            return None
-        except Exception as e:
-            print(f"Error watching for next button: {e}")
-            return None
-
     # Main monitoring loop
     processed_pages = set([current_detected_page or current_page])
-    last_check_time = time.time()
 
-    while True:
-        time.sleep(1)
+    while not closed:
         try:
-            # Check if user clicked Next
-            clicked_next = page.evaluate("window._clickedNext === true")
-            if clicked_next:
-                page.evaluate("window._clickedNext = false")
-                print("Detected Next button click")
-                page.wait_for_timeout(config.timeouts.navigation_timeout)  # Wait for Angular to update
-
-                new_page = detect_current_page()
-                if new_page and new_page not in processed_pages:
-                    print(f"New page detected after Next button: {new_page}")
-                    fill_form(page, new_page, mappings, data)
-                    processed_pages.add(new_page)
-
-            # Check for route changes
-            route_changes = page.evaluate("window._routeChanges || []")
-            if route_changes:
-                page.evaluate("window._routeChanges = []")
-                # print(f"Detected route changes: {route_changes}")
-
-                # Wait for Angular to finish rendering
-                page.wait_for_timeout(config.timeouts.standard_timeout)
-                page.wait_for_load_state("networkidle")
+            # Let Playwright deliver the binding calls, nothing is evaluated while waiting
+            page.wait_for_timeout(config.timeouts.navigation_event_interval)
 
-                new_page = detect_current_page()
+            while view_changes:
+                path, title = view_changes.pop(0)
+                new_page = match_page_name(title, mappings)
                 if new_page and new_page not in processed_pages:
-                    print(f"New page detected after route change: {new_page}")
-                    fill_form(page, new_page, mappings, data)
-                    processed_pages.add(new_page)
-
-            # Periodically check for Next button
-            if time.time() - last_check_time > config.timeouts.next_button_check_interval:
-                checker_fn = watch_for_next_button()
-                if checker_fn:
-                    last_check_time = time.time()            # Fallback: periodically check if page content changed substantially
-            if time.time() - last_check_time > config.timeouts.periodic_page_check_interval:
-                last_check_time = time.time()
-                new_page = detect_current_page()
-                if new_page and new_page not in processed_pages:
-                    print(f"Detected new page during periodic check: {new_page}")
+                    print(f"New page detected after navigation to {path}: {new_page}")
                     fill_form(page, new_page, mappings, data)
                     processed_pages.add(new_page)
 
@@ -339,7 +318,7 @@ def monitor_navigation(page: Page, current_page: str, mappings, data):
             print(f"Error in navigation monitor: {e}")
             
             # Check if the error indicates the browser/page was closed
-            if any(keyword in error_message.lower() for keyword in [
+            if closed or any(keyword in error_message.lower() for keyword in [
                 "target page, context or browser has been closed",
                 "page has been closed",
                 "browser has been closed", 
@@ -351,6 +330,8 @@ def monitor_navigation(page: Page, current_page: str, mappings, data):
             
             # Don't break the loop on other transient errors
             continue
+    else:
+        print("Browser was closed by user - exiting monitoring loop")
 
 
 def fill_nop(data):
@@ -1,119 +1,192 @@
+import time
 from playwright.sync_api import Page
 from ..config_loader import config
+from .field_selectors import FIND_ELEMENT_SCRIPT, get_selector_strategy
 
 
-def handle_dropdown(page: Page, selector: str, value: str):
-    """Handle dropdown selection with special handling for Angular selects."""
-    try:
-        # First try standard select method
-        page.select_option(selector, label=value)
-        return
-    except:
-        pass
-
-    # Get all options
-    options = page.locator(f"{selector} option").all()
-    for i, option in enumerate(options):
-        option_text = option.inner_text().strip()
-        option_value = option.get_attribute("value") or ""
-
-        # Try different matching strategies
-        if option_text == value or option_value == value:
-            page.select_option(selector, index=i)
-            return
-
-        # Check for partial text match (ignoring spaces)
-        if value.strip() in option_text.replace(" ", ""):
-            page.select_option(selector, index=i)
-            return
-
-        # Handle Angular's format "1: Hours"
-        if ":" in option_value and value in option_value:
-            page.select_option(selector, index=i)
-            return
-
-        # Extra check for time values like "08:00" in "8: 08:00"
-        if ":" in option_value and value.lstrip("0") in option_value:
-            page.select_option(selector, index=i)
-            return
-
-    # JavaScript fallback for stubborn selects
-    options = page.evaluate(f"""() => {{
-        const select = document.querySelector("{selector}");
-        const options = Array.from(select.options);
-        for (let i = 0; i < options.length; i++) {{
-            const option = options[i];
-            if (option.text.includes("{value}")) {{
-                select.selectedIndex = i;
-                select.dispatchEvent(new Event('change'));
-                return true;
-            }}
-        }}
-        return false;
-    }}""")
-
-    if not options:
-        print(f"Could not find dropdown option for: {value}")
-
-
-def handle_radio_button(page: Page, selector: str, value: str):
-    """Handle radio button selection."""
+# Sets each field's value with the element's native value setter, so Angular's value
+# accessors see the change, then sends the events Angular forms listen for.
+# Returns the ids of the fields that were filled.
+BULK_FILL_SCRIPT = """fields => {
+    const findElement = %s;
+
+    const filled = [];
+    for (const field of fields) {
+        const element = findElement(field.strategy);
+        // Only inputs and text areas are set here, anything else is left to its handler
+        let prototype;
+        if (element instanceof HTMLInputElement) {
+            prototype = HTMLInputElement.prototype;
+        } else if (element instanceof HTMLTextAreaElement) {
+            prototype = HTMLTextAreaElement.prototype;
+        } else {
+            continue;
+        }
+        const setter = Object.getOwnPropertyDescriptor(prototype, 'value').set;
+
+        element.focus();
+        setter.call(element, field.value);
+        element.dispatchEvent(new Event('input', {bubbles: true}));
+        element.dispatchEvent(new Event('change', {bubbles: true}));
+        element.blur();
+        filled.push(field.id);
+    }
+    return filled;
+}""" % FIND_ELEMENT_SCRIPT
+
+
+# Finds the option to select in a select element, or the first select inside a wrapper
+# element, trying the same rules in order as the option loop it replaces. Returns the option
+# index, or -1 if nothing matches, and whether the select was found inside a wrapper. If
+# only the loose text match finds an option, it is selected here directly like the old
+# JavaScript fallback did, and selected is true.
+MATCH_OPTION_SCRIPT = """(element, value) => {
+    const select = element.tagName === 'SELECT' ? element : element.querySelector('select');
+    if (!select) return {index: -1, selected: false, wrapped: false};
+    const wrapped = select !== element;
+
+    const options = Array.from(select.options);
+    const rules = [
+        // Exact match on the label, like select_option(label=...)
+        option => option.label === value,
+        option => option.textTrimmed === value || option.valueText === value,
+        // Check for partial text match (ignoring spaces)
+        option => option.textTrimmed.replace(/ /g, '').includes(value.trim()),
+        // Handle Angular's format "1: Hours"
+        option => option.valueText.includes(':') && option.valueText.includes(value),
+        // Extra check for time values like "08:00" in "8: 08:00"
+        option => option.valueText.includes(':')
+            && option.valueText.includes(value.replace(/^0+/, '')),
+    ];
+
+    const described = options.map(option => ({
+        label: option.label,
+        textTrimmed: (option.innerText || option.text || '').trim(),
+        valueText: option.getAttribute('value') || '',
+    }));
+    // The label rule is tried on every option before the per option rules
+    const byLabel = described.findIndex(rules[0]);
+    if (byLabel !== -1) return {index: byLabel, selected: false, wrapped: wrapped};
+    const byRules = described.findIndex(option => rules.slice(1).some(rule => rule(option)));
+    if (byRules !== -1) return {index: byRules, selected: false, wrapped: wrapped};
+
+    // Fallback for stubborn selects
+    const byText = options.findIndex(option => option.text.includes(value));
+    if (byText !== -1) {
+        select.selectedIndex = byText;
+        select.dispatchEvent(new Event('change'));
+        return {index: byText, selected: true, wrapped: wrapped};
+    }
+    return {index: -1, selected: false, wrapped: wrapped};
+}"""
+
+
+def handle_dropdown(page: Page, selector: str, value: str) -> bool:
+    """
+    Handle dropdown selection with special handling for Angular selects.
+
+    Returns whether an option matching the value was selected.
+    """
+    value = str(value)
+    element = page.locator(selector).first
+    deadline = time.monotonic() + config.timeouts.standard_timeout / 1000
+    while True:
+        try:
+            # Match every option in one call, with the value passed in rather than written
+            # into the script
+            match = element.evaluate(MATCH_OPTION_SCRIPT, value)
+        except Exception as e:
+            print(f"Could not read dropdown options for {selector}: {e}")
+            return False
+
+        if match["selected"] or match["index"] != -1 or time.monotonic() >= deadline:
+            break
+        # Options are often loaded after the select is shown, so look again until they are
+        page.wait_for_timeout(config.timeouts.field_interaction_delay)
+
+    if match["selected"]:
+        return True
+    if match["index"] != -1:
+        if match["wrapped"]:
+            element.locator("select").first.select_option(index=match["index"])
+        else:
+            page.select_option(selector, index=match["index"])
+        return True
+
+    print(f"Could not find dropdown option for: {value}")
+    return False
+
+
+# Returns the ids of the radio inputs, and the ids of the ones whose id contains the value
+# or whose value matches it ignoring case and spaces
+MATCH_RADIO_SCRIPT = """(radios, value) => {
+    const valueLower = value.toLowerCase();
+    const ids = radios.map(radio => radio.getAttribute('id') || '');
+    const matches = ids.filter((id, i) => {
+        const radioValue = (radios[i].getAttribute('value') || '').toLowerCase();
+        return id.toLowerCase().includes(valueLower)
+            || radioValue === valueLower
+            || radioValue.replace(/ /g, '') === valueLower.replace(/ /g, '');
+    });
+    return {ids: ids, matches: matches};
+}"""
+
+
+def handle_radio_button(page: Page, selector: str, value: str) -> bool:
+    """
+    Handle radio button selection.
+
+    Returns whether a radio matching the value was clicked, clicking another one as a
+    fallback doesn't count.
+    """
     try:
-        # Find all radio inputs with this name
-        radio_inputs = page.locator(f"{selector}").all()
-        if not radio_inputs:
+        # Find all radio inputs with this name and match them in one call
+        radios = page.locator(f"{selector}").evaluate_all(MATCH_RADIO_SCRIPT, str(value))
+        radio_ids = radios["ids"]
+        if not radio_ids:
             print(f"Error: No radio inputs found with selector: {selector}")
-            return
-
-        # Find the radio input whose ID contains the value
-        value_lower = value.lower()
-        for radio in radio_inputs:
-            radio_id = radio.get_attribute("id") or ""
-            radio_element_value = radio.get_attribute("value") or ""
-
-            # Check if ID or value match
-            if (
-                value_lower in radio_id.lower()
-                or radio_element_value.lower() == value_lower
-                or radio_element_value.lower().replace(" ", "") == value_lower.replace(" ", "")
-            ):
-                # For Angular applications, clicking the span might be more reliable
-                radio_id_selector = f"#{radio_id}"
-                span_selector = f'label[for="{radio_id}"] span.checkmark'
+            return False
+
+        # Try each radio input whose ID contains the value
+        for radio_id in radios["matches"]:
+            # For Angular applications, clicking the span might be more reliable
+            radio_id_selector = f"#{radio_id}"
+            span_selector = f'label[for="{radio_id}"] span.checkmark'
 
+            try:
+                # Try clicking the span first
+                if page.is_visible(span_selector, timeout=config.timeouts.short_timeout):
+                    page.click(span_selector)
+                    print(f"Clicked radio span: {span_selector}")
+                # If not, click the input directly
+                else:
+                    page.click(radio_id_selector)
+                    print(f"Clicked radio input: {radio_id_selector}")
+                return True
+            except Exception as direct_click_error:
+                print(f"Direct click failed, trying label: {direct_click_error}")
+
+                # Try clicking the label if span/input clicks failed
                 try:
-                    # Try clicking the span first
-                    if page.is_visible(span_selector, timeout=config.timeouts.short_timeout):
-                        page.click(span_selector)
-                        print(f"Clicked radio span: {span_selector}")
-                    # If not, click the input directly
-                    else:
-                        page.click(radio_id_selector)
-                        print(f"Clicked radio input: {radio_id_selector}")
-                    return
-                except Exception as direct_click_error:
-                    print(f"Direct click failed, trying label: {direct_click_error}")
-
-                    # Try clicking the label if span/input clicks failed
-                    try:
-                        label_selector = f'label[for="{radio_id}"]'
-                        if page.is_visible(label_selector, timeout=config.timeouts.short_timeout):
-                            page.click(label_selector)
-                            print(f"Clicked radio label: {label_selector}")
-                            return
-                    except Exception as label_click_error:
-                        print(f"Label click also failed: {label_click_error}")
+                    label_selector = f'label[for="{radio_id}"]'
+                    if page.is_visible(label_selector, timeout=config.timeouts.short_timeout):
+                        page.click(label_selector)
+                        print(f"Clicked radio label: {label_selector}")
+                        return True
+                except Exception as label_click_error:
+                    print(f"Label click also failed: {label_click_error}")
 
         # If we got here, we didn't find a matching radio
         print(f"Could not find radio option matching value: {value}")
         # Try clicking the first radio as fallback
-        if radio_inputs:
-            first_radio_id = radio_inputs[0].get_attribute("id")
+        if radio_ids:
+            first_radio_id = radio_ids[0]
             try:
                 page.click(f"#{first_radio_id}")
                 print(f"Clicked first radio as fallback: #{first_radio_id}")
             except:
                 print("Could not click any radio button")
+        return False
 
     except Exception as e:
         print(f"Error in handle_radio_button: {e}")
@@ -123,10 +196,15 @@ def handle_radio_button(page: Page, selector: str, value: str):
             print(f"Clicked original selector as last resort: {selector}")
         except:
             pass
+        return False
+
 
+def handle_checkbox(page: Page, selector: str, value: str) -> bool:
+    """
+    Handle checkbox selection.
 
-def handle_checkbox(page: Page, selector: str, value: str):
-    """Handle checkbox selection."""
+    Returns whether the checkbox was left in the state the value asks for.
+    """
     try:
         # Convert value to boolean if it's not already
         if isinstance(value, str):
@@ -137,10 +215,11 @@ def handle_checkbox(page: Page, selector: str, value: str):
         # First try direct checkbox
         try:
             is_checked = page.is_checked(selector)
-            if is_checked != should_check:
-                page.click(selector, timeout=config.timeouts.short_timeout)
-                print(f"Clicked checkbox {selector} directly")
-                return
+            if is_checked == should_check:
+                return True
+            page.click(selector, timeout=config.timeouts.short_timeout)
+            print(f"Clicked checkbox {selector} directly")
+            return True
         except Exception as e:
             print(f"Direct checkbox click failed: {e}")
 
@@ -151,24 +230,22 @@ def handle_checkbox(page: Page, selector: str, value: str):
             if input_exists:
                 # Get current checked state
                 is_checked = page.evaluate(f'document.querySelector("{selector}").checked')
+                if is_checked == should_check:
+                    return True
 
-                # If state needs to be changed
-                if is_checked != should_check:
-                    # Try clicking the span
-                    span_selector = (
-                        f'label[for="{selector.replace("#", "")}"] span.checkmark-checkbox'
-                    )
-                    if page.is_visible(span_selector):
-                        page.click(span_selector)
-                        print(f"Clicked checkbox span {span_selector}")
-                        return
-
-                    # Try clicking the label
-                    label_selector = f'label[for="{selector.replace("#", "")}"]'
-                    if page.is_visible(label_selector):
-                        page.click(label_selector)
-                        print(f"Clicked checkbox label {label_selector}")
-                        return
+                # Try clicking the span
+                span_selector = f'label[for="{selector.replace("#", "")}"] span.checkmark-checkbox'
+                if page.is_visible(span_selector):
+                    page.click(span_selector)
+                    print(f"Clicked checkbox span {span_selector}")
+                    return True
+
+                # Try clicking the label
+                label_selector = f'label[for="{selector.replace("#", "")}"]'
+                if page.is_visible(label_selector):
+                    page.click(label_selector)
+                    print(f"Clicked checkbox label {label_selector}")
+                    return True
 
         except Exception as e:
             print(f"Span/label click failed: {e}")
@@ -177,6 +254,7 @@ def handle_checkbox(page: Page, selector: str, value: str):
 
     except Exception as e:
         print(f"Error in handle_checkbox: {e}")
+    return False
 
 
 def handle_address(page: Page, selector: str, value: str):
@@ -208,3 +286,26 @@ def handle_address(page: Page, selector: str, value: str):
             print("Pressed Enter to select top Google autocomplete suggestion")
     except Exception as e:
         print(f"Error selecting address from Google autocomplete: {e}")
+
+
+def handle_bulk_fill(page: Page, fields) -> set[str]:
+    """
+    Fill plain value fields in one call to the browser.
+
+    Takes (field_id, field_type, selector, value) tuples and returns the ids of the fields
+    that were filled, so the rest can be filled one at a time.
+    """
+    bulk_fields = []
+    for field_id, field_type, selector, value in fields:
+        strategy = get_selector_strategy(field_id, field_type, selector)
+        if strategy:
+            bulk_fields.append({"id": field_id, "strategy": strategy, "value": str(value)})
+
+    if not bulk_fields:
+        return set()
+
+    try:
+        return set(page.evaluate(BULK_FILL_SCRIPT, bulk_fields))
+    except Exception as e:
+        print(f"Error in handle_bulk_fill: {e}")
+        return set()
@@ -1,7 +1,8 @@
-from fillpdf import fillpdfs
 import fitz  # PyMuPDF
 import re
 import argparse
+from ..config_loader import config
+from ..pdf_forms import extract_fillable_data, open_pdf
 
 def show_mupdf_errors(show: bool = True):
     try:
@@ -10,28 +11,43 @@ def show_mupdf_errors(show: bool = True):
         # Fallback for older versions
         pass
     
-def extract_fillable_data(pdf_path) -> dict:
-    fields = fillpdfs.get_form_fields(pdf_path)
-    fields = {k: v for k, v in fields.items() if "check box" not in k.lower()}
+def compile_risk_pattern(risk_terms) -> re.Pattern:
+    """
+    Compile the risk terms into one pattern so each page's text is scanned once.
 
-    return fields
+    Longer terms come first, so a term that contains another is matched as itself.
+    """
+    terms = sorted({term.lower() for term in risk_terms}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(term) for term in terms))
 
-def extract_risk_data(pdf_path) -> dict:
-    risk_data = {"low risk": 0, "moderate risk": 0, "high risk": 0}
+def count_risk_terms(text, pattern: re.Pattern, risk_data: dict):
+    for match in pattern.finditer(text.lower()):
+        risk_data[match.group(0)] += 1
 
+def extract_risk_data(pdf) -> dict:
+    """Count how often each configured risk term appears in the text of a PDF"""
+    risk_terms = config.nop.risk_terms
+    risk_data = {term.lower(): 0 for term in risk_terms}
+    pattern = compile_risk_pattern(risk_terms)
+
+    doc, close = open_pdf(pdf)
     show_mupdf_errors(False)
-    pdf = fitz.open(pdf_path)
-    for page_num in range(len(pdf)):
-        page = pdf[page_num]
-        # Extract text from the page
-        text = page.get_text()  # type: ignore
-        for risk in risk_data.keys():
-            risk_data[risk] += text.lower().count(risk)
-    pdf.close()
-    show_mupdf_errors(True)
+    try:
+        for page in doc:
+            count_risk_terms(page.get_text(), pattern, risk_data)  # type: ignore
+    finally:
+        show_mupdf_errors(True)
+        if close:
+            doc.close()
 
     return risk_data
 
+def get_risk_level(risk_data: dict) -> str:
+    """Return the risk level of the most frequent term, the first configured term wins a tie"""
+    risk_levels = {term.lower(): level for term, level in config.nop.risk_terms.items()}
+    max_risk = max(risk_data.items(), key=lambda x: x[1])
+    return risk_levels[max_risk[0]]
+
 def separate_name_and_phone(input_string):
     """
     Separates the phone number from the name in a given string.
@@ -57,19 +73,22 @@ def separate_name_and_phone(input_string):
     else:
         return None, None, None
 
-def extract_fillable_data_with_risk(pdf_path) -> dict:
-    fields = extract_fillable_data(pdf_path)
-    risk_data = extract_risk_data(pdf_path)
+def extract_fillable_data_with_risk(pdf_path, parallel_risk_scan=True) -> dict:
+    from .risk_scan import get_pdf_risk_data
 
-    max_risk = max(risk_data.items(), key=lambda x: x[1])
-    risk_level_map = {
-        "low risk": "Low",
-        "moderate risk": "Moderate",
-        "high risk": "High"
-    }
+    # Open the PDF once for both the form fields and the risk counts
+    doc = fitz.open(pdf_path)
+    try:
+        fields = extract_fillable_data(doc)
+        if parallel_risk_scan:
+            risk_data = get_pdf_risk_data(doc, pdf_path)
+        else:
+            risk_data = extract_risk_data(doc)
+    finally:
+        doc.close()
 
     fields["FIRST_NAME"], fields["LAST_NAME"], fields["PHONE"] = separate_name_and_phone(fields["PROJECT MANAGER"])
-    fields["RISK_CALC"] = risk_level_map[max_risk[0]]
+    fields["RISK_CALC"] = get_risk_level(risk_data)
 
     return fields
 
@@ -0,0 +1,72 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import fitz  # PyMuPDF
+from ..config_loader import config
+from .pdf_to_data import (
+    compile_risk_pattern,
+    count_risk_terms,
+    extract_risk_data,
+    show_mupdf_errors,
+)
+
+
+def count_page_range(pdf_path, start, stop, risk_terms) -> dict:
+    """Count the risk terms on pages start to stop - 1, opening the PDF in this process"""
+    risk_data = {term.lower(): 0 for term in risk_terms}
+    pattern = compile_risk_pattern(risk_terms)
+
+    show_mupdf_errors(False)
+    doc = fitz.open(pdf_path)
+    try:
+        for page_num in range(start, stop):
+            count_risk_terms(doc[page_num].get_text(), pattern, risk_data)  # type: ignore
+    finally:
+        doc.close()
+        show_mupdf_errors(True)
+
+    return risk_data
+
+
+def scan_risk_data(pdf_path, page_count=None, workers=None) -> dict:
+    """
+    Count the risk terms of a PDF, splitting its pages across worker processes.
+
+    Gives the same counts as extract_risk_data.
+    """
+    scan_config = config.nop.risk_scan
+    risk_terms = list(config.nop.risk_terms)
+
+    if page_count is None:
+        doc = fitz.open(pdf_path)
+        page_count = len(doc)
+        doc.close()
+
+    pages_per_task = max(1, scan_config.pages_per_task)
+    ranges = [
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+
+    risk_data = {term.lower(): 0 for term in risk_terms}
+    workers = workers or scan_config.workers or None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(count_page_range, pdf_path, start, stop, risk_terms)
+            for start, stop in ranges
+        ]
+        for future in as_completed(futures):
+            for term, count in future.result().items():
+                risk_data[term] += count
+
+    return risk_data
+
+
+def get_pdf_risk_data(doc: fitz.Document, pdf_path) -> dict:
+    """Count the risk terms of an open PDF, using worker processes for long documents"""
+    page_count = len(doc)
+    # Starting the worker processes costs more than they save unless the PDF is very long,
+    # so this is off unless a page count is set
+    min_pages = config.nop.risk_scan.parallel_min_pages
+    if min_pages and page_count >= min_pages:
+        return scan_risk_data(pdf_path, page_count)
+    return extract_risk_data(doc)
+
@@ -0,0 +1,89 @@
+import glob
+import os
+import tempfile
+import unittest
+import docx
+from docx.enum.text import WD_BREAK
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from procedure_generator.swp.docx_text import (
+    iter_paragraph_texts,
+    read_docx_text,
+    read_docx_text_with_python_docx,
+)
+
+PROCEDURE_DOCUMENTS = os.path.join(
+    os.path.dirname(__file__), "..", "procedure_generator", "examples", "Procedure Documents"
+)
+
+
+def add_hyperlink(paragraph, text):
+    hyperlink = OxmlElement("w:hyperlink")
+    hyperlink.set(qn("w:anchor"), "target")
+    run = OxmlElement("w:r")
+    text_element = OxmlElement("w:t")
+    text_element.text = text
+    run.append(text_element)
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+
+class DocxTextTest(unittest.TestCase):
+    def assertSameText(self, file_path):
+        expected = read_docx_text_with_python_docx(file_path)
+        # read_docx_text falls back to python-docx, so check the streaming reader directly
+        self.assertEqual("\n".join(iter_paragraph_texts(file_path)), expected)
+        self.assertEqual(read_docx_text(file_path), expected)
+
+    def test_example_procedures(self):
+        file_paths = glob.glob(os.path.join(PROCEDURE_DOCUMENTS, "**", "*.docx"), recursive=True)
+        self.assertTrue(file_paths)
+        for file_path in file_paths:
+            with self.subTest(file_path=os.path.basename(file_path)):
+                self.assertSameText(file_path)
+
+    def test_edge_cases(self):
+        document = docx.Document()
+        document.add_paragraph("Tab\tseparated\tvalues")
+
+        paragraph = document.add_paragraph("Line one")
+        paragraph.add_run().add_break()
+        paragraph.add_run("Line two")
+        paragraph.add_run().add_break(WD_BREAK.PAGE)
+        paragraph.add_run("After a page break")
+
+        document.add_paragraph()
+        document.add_paragraph("")
+
+        paragraph = document.add_paragraph()
+        for part in ["Split ", "across ", "", "runs"]:
+            paragraph.add_run(part)
+
+        paragraph = document.add_paragraph("See ")
+        add_hyperlink(paragraph, "the linked step")
+
+        table = document.add_table(rows=1, cols=1)
+        table.cell(0, 0).text = "Table text isn't paragraph text"
+        document.add_paragraph("Last paragraph")
+
+        with tempfile.TemporaryDirectory() as temp_folder:
+            file_path = os.path.join(temp_folder, "edge_cases.docx")
+            document.save(file_path)
+            self.assertSameText(file_path)
+            self.assertEqual(
+                read_docx_text(file_path).split("\n"),
+                [
+                    "Tab\tseparated\tvalues",
+                    "Line one",
+                    "Line twoAfter a page break",
+                    "",
+                    "",
+                    "Split across runs",
+                    "See the linked step",
+                    "Last paragraph",
+                ],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
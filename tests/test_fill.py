@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from procedure_generator.cache import DiskCache
+from procedure_generator.config_loader import config
+from procedure_generator.worksafe_nop import field_selectors, fill
+
+
+class LearnedSelectorTest(unittest.TestCase):
+    def setUp(self):
+        temp_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_folder.cleanup)
+        for patcher in [
+            mock.patch.object(config.cache, "folder", temp_folder.name),
+            mock.patch.object(config.cache, "enabled", True),
+            mock.patch.object(
+                field_selectors, "learned_selector_cache", DiskCache("test_selectors")
+            ),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.mappings = SimpleNamespace(
+            pages=[{"work details": {"shift": {"type": "select", "data_key": "SHIFT"}}}],
+            transformations={},
+            bulk_fill=False,
+        )
+        # The browser finds the field with the selector it was learned with
+        self.page = mock.MagicMock()
+        self.page.evaluate.return_value = {"shift": "#shift"}
+        field_selectors.learn_selector("work details", "shift", "select", "#shift")
+
+    def learned_selector(self):
+        key = field_selectors._learned_selector_key("work details", "shift", "select")
+        return field_selectors.learned_selector_cache.get_json(key)
+
+    def test_selector_kept_when_the_handler_sets_the_value(self):
+        with mock.patch.object(fill, "handle_dropdown", return_value=True) as handle_dropdown:
+            fill.fill_form(self.page, "work details", self.mappings, {"SHIFT": "Days"})
+
+        handle_dropdown.assert_called_once_with(self.page, "#shift", "Days")
+        self.assertEqual(self.learned_selector(), "#shift")
+
+    def test_selector_forgotten_when_the_handler_fails(self):
+        with mock.patch.object(fill, "handle_dropdown", return_value=False):
+            fill.fill_form(self.page, "work details", self.mappings, {"SHIFT": "Nights"})
+
+        self.assertIsNone(self.learned_selector())
+
+
+if __name__ == "__main__":
+    unittest.main()
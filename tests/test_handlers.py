@@ -0,0 +1,43 @@
+import unittest
+from unittest import mock
+from procedure_generator.worksafe_nop.handlers import handle_dropdown
+
+NO_MATCH = {"index": -1, "selected": False, "wrapped": False}
+
+
+class HandleDropdownTest(unittest.TestCase):
+    def test_waits_for_options_loaded_late(self):
+        page = mock.MagicMock()
+        element = page.locator.return_value.first
+        element.evaluate.side_effect = [
+            NO_MATCH,
+            NO_MATCH,
+            {"index": 2, "selected": False, "wrapped": False},
+        ]
+
+        self.assertTrue(handle_dropdown(page, "#shift", "Days"))
+        self.assertEqual(element.evaluate.call_count, 3)
+        page.select_option.assert_called_once_with("#shift", index=2)
+
+    def test_selects_inside_a_wrapper(self):
+        page = mock.MagicMock()
+        element = page.locator.return_value.first
+        element.evaluate.return_value = {"index": 1, "selected": False, "wrapped": True}
+
+        self.assertTrue(handle_dropdown(page, "[formcontrolname='shift']", "Hours"))
+        element.locator.assert_called_once_with("select")
+        element.locator.return_value.first.select_option.assert_called_once_with(index=1)
+        page.select_option.assert_not_called()
+
+    def test_gives_up_when_no_option_matches(self):
+        page = mock.MagicMock()
+        page.locator.return_value.first.evaluate.return_value = NO_MATCH
+
+        with mock.patch("procedure_generator.worksafe_nop.handlers.time.monotonic") as monotonic:
+            monotonic.side_effect = [0, 0.5, 5]
+            self.assertFalse(handle_dropdown(page, "#shift", "Weeks"))
+        page.select_option.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
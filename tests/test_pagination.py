@@ -0,0 +1,38 @@
+import unittest
+import fitz
+from procedure_generator.swp.pagination import measure_text_field
+from tests.test_pdf_forms import make_form
+
+
+def set_default_appearance(doc: fitz.Document, appearance: str) -> fitz.Document:
+    """Return the form with its first widget's font and size set, as Acrobat writes them"""
+    widget = next(doc[0].widgets())
+    doc.xref_set_key(widget.xref, "DA", f"({appearance})")
+    return fitz.open("pdf", doc.tobytes())
+
+
+class MeasureTextFieldTest(unittest.TestCase):
+    def test_font_names(self):
+        for font, fontname in [
+            ("Helv", "helv"),
+            ("HeBo", "hebo"),
+            ("TiBo", "tibo"),
+            ("CoBo", "cobo"),
+            ("TiRo", "tiro"),
+            ("Helvetica-Bold", "hebo"),
+            ("Arial", "helv"),
+        ]:
+            with self.subTest(font=font):
+                doc = set_default_appearance(make_form("SWP"), f"0 0 0 rg /{font} 11 Tf")
+                layout = measure_text_field(doc, "SWP")
+                assert layout is not None
+                self.assertEqual(layout.fontname, fontname)
+                self.assertEqual(layout.fontsize, 11)
+
+    def test_auto_sized_text(self):
+        doc = set_default_appearance(make_form("SWP"), "0 0 0 rg /HeBo 0 Tf")
+        self.assertIsNone(measure_text_field(doc, "SWP"))
+
+
+if __name__ == "__main__":
+    unittest.main()
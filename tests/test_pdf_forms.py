@@ -0,0 +1,41 @@
+import unittest
+import fitz
+from procedure_generator.pdf_forms import FieldIndex
+
+
+def make_form(*field_names) -> fitz.Document:
+    """Return a new PDF with one text field per page"""
+    doc = fitz.open()
+    for field_name in field_names:
+        page = doc.new_page()
+        widget = fitz.Widget()
+        widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+        widget.field_name = field_name
+        widget.rect = fitz.Rect(50, 50, 300, 80)
+        page.add_widget(widget)
+    return fitz.open("pdf", doc.tobytes())
+
+
+class FieldIndexTest(unittest.TestCase):
+    def test_fill_field_through_index(self):
+        doc = make_form("SWP", "SWP2")
+        field_index = FieldIndex(doc)
+
+        for widget in field_index.widgets("SWP2"):
+            widget.field_value = "Procedure text"
+            widget.update()
+
+        filled = fitz.open("pdf", doc.tobytes())
+        values = {widget.field_name: widget.field_value for widget in filled[1].widgets()}
+        self.assertEqual(values, {"SWP2": "Procedure text"})
+
+    def test_widget_page_stays_loaded(self):
+        doc = make_form("SWP")
+        (page, widget), = FieldIndex(doc).page_widgets("SWP")
+
+        self.assertEqual(page.number, 0)
+        self.assertEqual(widget.parent.number, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import fitz
+from procedure_generator.config_loader import config
+from procedure_generator.worksafe_nop import risk_scan
+from procedure_generator.worksafe_nop.pdf_to_data import extract_risk_data, get_risk_level
+
+
+def make_pdf(path, page_texts):
+    doc = fitz.open()
+    for text in page_texts:
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+class RiskScanTest(unittest.TestCase):
+    def setUp(self):
+        temp_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_folder.cleanup)
+        self.pdf_path = os.path.join(temp_folder.name, "swp.pdf")
+
+        # Different terms lead on different pages, and term case varies like real SWPs
+        page_texts = []
+        for n in range(12):
+            text = "Low risk of slips. " * (n % 3)
+            text += "Moderate Risk near the edge. " * (n % 4)
+            text += "HIGH RISK when lifting. " * (1 if n == 5 else 0)
+            page_texts.append(text + "Wear PPE.")
+        make_pdf(self.pdf_path, page_texts)
+
+    def test_scan_matches_sequential(self):
+        expected = extract_risk_data(self.pdf_path)
+        self.assertEqual(expected, {"low risk": 12, "moderate risk": 18, "high risk": 1})
+
+        for pages_per_task in [1, 5, 20]:
+            with self.subTest(pages_per_task=pages_per_task), mock.patch.object(
+                config.nop.risk_scan, "pages_per_task", pages_per_task
+            ):
+                risk_data = risk_scan.scan_risk_data(self.pdf_path, workers=3)
+                self.assertEqual(risk_data, expected)
+                self.assertEqual(get_risk_level(risk_data), get_risk_level(expected))
+
+    def test_long_pdf_uses_worker_processes(self):
+        expected = extract_risk_data(self.pdf_path)
+
+        with mock.patch.object(config.nop.risk_scan, "parallel_min_pages", 10), mock.patch.object(
+            config.nop.risk_scan, "pages_per_task", 4
+        ), mock.patch.object(
+            risk_scan, "scan_risk_data", wraps=risk_scan.scan_risk_data
+        ) as scan_risk_data:
+            doc = fitz.open(self.pdf_path)
+            try:
+                risk_data = risk_scan.get_pdf_risk_data(doc, self.pdf_path)
+            finally:
+                doc.close()
+
+        scan_risk_data.assert_called_once()
+        self.assertEqual(risk_data, expected)
+        self.assertEqual(get_risk_level(risk_data), "Moderate")
+
+    def test_short_pdf_is_scanned_in_process(self):
+        with mock.patch.object(config.nop.risk_scan, "parallel_min_pages", 13), mock.patch.object(
+            risk_scan, "scan_risk_data"
+        ) as scan_risk_data:
+            doc = fitz.open(self.pdf_path)
+            try:
+                risk_data = risk_scan.get_pdf_risk_data(doc, self.pdf_path)
+            finally:
+                doc.close()
+
+        scan_risk_data.assert_not_called()
+        self.assertEqual(risk_data, extract_risk_data(self.pdf_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
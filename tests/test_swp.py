@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from procedure_generator.config_loader import config
+from procedure_generator.swp.swp import get_generation_key
+from tests.test_pdf_forms import make_form
+
+
+class GenerationKeyTest(unittest.TestCase):
+    def setUp(self):
+        temp_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_folder.cleanup)
+        self.template_pdf = os.path.join(temp_folder.name, "template.pdf")
+        make_form("SWP").save(self.template_pdf)
+
+    def get_key(self):
+        return get_generation_key({"WORK_PROCEDURE_SELECT": "A Job"}, self.template_pdf, [])
+
+    def test_speed_settings_keep_the_key(self):
+        key = self.get_key()
+        for setting, value in [
+            ("batch_workers", 7),
+            ("folder_scan_threads", 3),
+            ("skip_unchanged", not config.generation.skip_unchanged),
+        ]:
+            with self.subTest(setting=setting), mock.patch.object(
+                config.generation, setting, value
+            ):
+                self.assertEqual(self.get_key(), key)
+
+    def test_output_settings_change_the_key(self):
+        key = self.get_key()
+        for setting in ["layout_pagination", "prerendered_procedures"]:
+            with self.subTest(setting=setting), mock.patch.object(
+                config.generation, setting, not getattr(config.generation, setting)
+            ):
+                self.assertNotEqual(self.get_key(), key)
+
+
+if __name__ == "__main__":
+    unittest.main()